@@ -0,0 +1,260 @@
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_raw_path
+from utils.cuisines import load_cuisine_table
+from utils.helpers import (CURRENCY_RATES_PATH, CUISINES_PATH, MANIFEST_PATH, PROCESSED_DATA_PATH, ROLLUP_PATH,
+                           load_data, process_data, rename_columns)
+from utils.loader import bytes_per_row, clear_cache, load_dataset
+from utils.maps import MAP_COLUMNS
+from utils.report import load_page
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+DEFAULT_SIZES = ["10k", "100k"]
+
+BASELINE_PATH = "benchmarks/baseline.json"
+
+# The ETL streams the raw file in chunks of this many rows, so the 10m case fits in memory.
+ETL_CHUNKSIZE = 1_000_000
+
+# A case regresses when it is this much slower (or hungrier) than the baseline...
+TOLERANCE = 0.25
+
+# ...and the difference is above the noise floor.
+MIN_SECONDS = 0.005
+MIN_PEAK_MB = 1.0
+
+MODULES = {
+    "countries": "pages/1_🌍_Countries.py",
+    "cities": "pages/2_🏙️_Cities.py",
+    "cuisines": "pages/3_🍽️_Cuisines.py",
+    "home": "📊_Home.py",
+}
+
+# Run in a fresh interpreter: imports a page the way Streamlit first runs it and reports the time
+# spent importing (interpreter start-up excluded) and the peak RSS.
+IMPORT_PROBE = """
+import importlib.util, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("page", sys.argv[1])
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+seconds = time.perf_counter() - start
+try:
+    import resource
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+except ImportError:
+    peak_kb = 0
+print(seconds, peak_kb)
+"""
+
+def benchmark_cases(raw_path, modules):
+    """
+    (name, setup, run) for every benchmarked function. `setup` runs untimed before each `run`; the
+    processed artifacts must already exist in the current directory.
+    """
+
+    countries, cities, cuisines, home = (modules[name] for name in ("countries", "cities", "cuisines", "home"))
+
+    def reset_manifest():
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(MANIFEST_PATH)
+
+    raw = pd.read_csv(raw_path)
+    df = load_data()
+    cube = load_data(file_path=ROLLUP_PATH)
+    table = load_cuisine_table(CUISINES_PATH)
+    positions = np.arange(len(df))
+    all_cuisines = table["categories"].tolist()
+    nothing = lambda: None
+
+    return [
+        ("etl.process_data", reset_manifest, lambda: process_data(raw_path, chunksize=ETL_CHUNKSIZE)),
+        ("etl.rename_columns", nothing, lambda: rename_columns(raw)),
+        ("loader.load_dataset", clear_cache, lambda: load_dataset(file_path=PROCESSED_DATA_PATH)),
+        ("countries.restaurants_by_country", nothing,
+         lambda: countries.get_barplot_count_column_by_country(cube, 'restaurant_id', 'number_of_restaurants')),
+        ("countries.cities_by_country", nothing,
+         lambda: countries.get_barplot_count_column_by_country(cube, 'city', 'number_of_cities')),
+        ("countries.average_rating_by_country", nothing,
+         lambda: countries.calculate_average_metric_by_country(cube, 'aggregate_rating')),
+        ("cities.top_mean_rating", nothing,
+         lambda: cities.generate_top_cities_by_mean_metric(cube, 'aggregate_rating', ascrending=False)),
+        ("cities.top_rating_count", nothing,
+         lambda: cities.generate_top_cities_by_rating_count(cube, above=True, value=4)),
+        ("cities.top_unique_cuisines", nothing, lambda: cities.generate_top_cities_by_unique_cuisines(cube)),
+        ("cuisines.mean_rating_by_cuisine", nothing,
+         lambda: cuisines.get_cuisines_mean_metric_barplot_fig(cube, ascending=False, metric='aggregate_rating')),
+        ("cuisines.mean_rating_by_all_cuisines", nothing,
+         lambda: cuisines.get_all_cuisines_mean_metric_barplot_fig(table, df, positions, all_cuisines,
+                                                                   ascending=False, metric='aggregate_rating')),
+        ("cuisines.top_restaurants", nothing, lambda: cuisines.generate_top_cuisines_metrics(df, top_n=10)),
+        ("home.create_map", nothing, lambda: home.create_map(df[MAP_COLUMNS])),
+    ]
+
+def measure(setup, run, repeat):
+    """Best and mean wall time over `repeat` runs, then the traced peak memory of one more run."""
+
+    seconds = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+
+    # Tracing slows allocations down, so memory is measured in a separate, untimed run. It covers
+    # Python and numpy allocations; Arrow's own memory pool is not traced.
+    setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": min(seconds), "mean_seconds": sum(seconds) / len(seconds), "peak_mb": peak / 2 ** 20}
+
+def measure_import(path, repeat):
+    """Cold import time and peak RSS of a page, best of `repeat` fresh interpreters."""
+
+    seconds, peaks = [], []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", IMPORT_PROBE, os.path.abspath(path)],
+                                capture_output=True, text=True, check=True).stdout
+        run_seconds, peak_kb = output.split()[-2:]
+        seconds.append(float(run_seconds))
+        peaks.append(int(peak_kb) / 1024)
+    return {"seconds": min(seconds), "mean_seconds": sum(seconds) / len(seconds), "peak_mb": min(peaks)}
+
+def run_import_benchmarks(repeat=3):
+    """
+    Cold import time of every page, the start-up cost paid by each new server process.
+
+    Returns:
+    - dict: page -> {"seconds", "mean_seconds", "peak_mb"}.
+    """
+
+    results = {}
+    for name, path in MODULES.items():
+        results[name] = measure_import(path, repeat)
+        print(f"{'import':>7} {name:<40} {results[name]['seconds'] * 1000:10.1f} ms "
+              f"{results[name]['peak_mb']:10.1f} MB", flush=True)
+    return results
+
+def print_memory_report(size):
+    """Bytes per row of the restaurant table as stored (load_data) and as served (load_dataset)."""
+
+    clear_cache()
+    stored = bytes_per_row(load_data())
+    served = bytes_per_row(load_dataset(file_path=PROCESSED_DATA_PATH))
+    clear_cache()
+    for column in stored.index:
+        print(f"{size:>7} {'bytes/row ' + column:<40} {stored[column]:10.1f} -> {served[column]:6.1f}", flush=True)
+
+def run_benchmarks(sizes, repeat=3, seed=0, data_dir="benchmarks/data"):
+    """
+    Time every case on synthetic data of each size.
+
+    Each size runs in a scratch working directory, so the ETL writes its artifacts there and never
+    touches data/processed.
+
+    Returns:
+    - dict: size -> case name -> {"seconds", "mean_seconds", "peak_mb"}.
+    """
+
+    modules = {name: load_page(name, path) for name, path in MODULES.items()}
+    cwd = os.getcwd()
+    results = {}
+
+    for size in sizes:
+        raw_path = os.path.abspath(synthetic_raw_path(SIZES[size], seed=seed, data_dir=data_dir))
+        with tempfile.TemporaryDirectory() as workdir:
+            # The ETL reads the conversion table from the working directory, like the artifacts it writes.
+            os.makedirs(os.path.join(workdir, os.path.dirname(CURRENCY_RATES_PATH)))
+            shutil.copy(CURRENCY_RATES_PATH, os.path.join(workdir, CURRENCY_RATES_PATH))
+            os.chdir(workdir)
+            try:
+                process_data(raw_path, chunksize=ETL_CHUNKSIZE)
+                results[size] = {}
+                print_memory_report(size)
+                for name, setup, run in benchmark_cases(raw_path, modules):
+                    results[size][name] = measure(setup, run, repeat)
+                    result = results[size][name]
+                    print(f"{size:>7} {name:<40} {result['seconds'] * 1000:10.1f} ms {result['peak_mb']:10.1f} MB",
+                          flush=True)
+            finally:
+                os.chdir(cwd)
+
+    return results
+
+def find_regressions(results, baseline, tolerance=TOLERANCE):
+    """Cases slower or using more memory than the baseline, beyond `tolerance` and the noise floor."""
+
+    regressions = []
+    for size, cases in results.items():
+        for name, result in cases.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference is None:
+                continue
+            for key, floor, unit in (("seconds", MIN_SECONDS, "s"), ("peak_mb", MIN_PEAK_MB, "MB")):
+                if (result[key] > reference[key] * (1 + tolerance)
+                        and result[key] - reference[key] > floor):
+                    regressions.append(f"{size} {name}: {key} {result[key]:.3f}{unit} "
+                                       f"vs {reference[key]:.3f}{unit} baseline")
+    return regressions
+
+def read_baseline(file_path=BASELINE_PATH):
+    if not os.path.exists(file_path):
+        return {}
+    with open(file_path) as f:
+        return json.load(f)
+
+def write_results(results, file_path):
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, file_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ETL and the page aggregations on synthetic data.")
+    parser.add_argument("--sizes", nargs="*", choices=list(SIZES), default=DEFAULT_SIZES,
+                        help="Synthetic dataset sizes to run; none to only measure imports")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the best one is kept")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data")
+    parser.add_argument("--data-dir", default="benchmarks/data", help="Where synthetic raw files are cached")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline results to compare with")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Allowed relative slowdown")
+    parser.add_argument("--skip-imports", action="store_true", help="Do not measure page import times")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    args = parser.parse_args()
+
+    results = {} if args.skip_imports else {"imports": run_import_benchmarks(repeat=args.repeat)}
+    results.update(run_benchmarks(args.sizes, repeat=args.repeat, seed=args.seed, data_dir=args.data_dir))
+    if args.output:
+        write_results(results, args.output)
+
+    baseline = read_baseline(args.baseline)
+    if args.update_baseline:
+        write_results(dict(baseline, **results), args.baseline)
+        return 0
+
+    regressions = find_regressions(results, baseline, tolerance=args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Real export the synthetic rows are resampled from, so every column keeps its type, value
+# distribution and cross-column consistency (country code <-> currency <-> city, rating <-> color...).
+TEMPLATE_PATH = "data/raw/zomato.csv"
+
+# Share of rows that repeat an earlier restaurant verbatim, as in the real export (~8%).
+DUPLICATE_FRACTION = 0.08
+
+# Restaurant IDs of the real export stay below this; synthetic IDs start above it.
+FIRST_SYNTHETIC_ID = 100_000_000
+
+CHUNK_ROWS = 500_000
+
+def synthetic_chunk(template, n_rows, first_id, rng):
+    """
+    `n_rows` Zomato-shaped raw rows resampled from `template`, with fresh restaurant IDs starting at
+    `first_id`, jittered coordinates and votes, and adjacent duplicate rows.
+
+    Returns:
+    - pandas.DataFrame: The rows, with the columns of the raw export.
+    """
+
+    n_unique = n_rows - int(n_rows * DUPLICATE_FRACTION)
+    df = template.take(rng.integers(0, len(template), n_unique)).reset_index(drop=True)
+    df["Restaurant ID"] = np.arange(first_id, first_id + n_unique)
+    df["Latitude"] = (df["Latitude"] + rng.normal(0, 0.01, n_unique)).clip(-90, 90)
+    df["Longitude"] = (df["Longitude"] + rng.normal(0, 0.01, n_unique)).clip(-180, 180)
+    df["Votes"] = rng.poisson(df["Votes"].to_numpy())
+
+    rows = np.sort(np.concatenate([np.arange(n_unique), rng.integers(0, n_unique, n_rows - n_unique)]))
+    return df.take(rows)
+
+def write_synthetic_raw(file_path, n_rows, seed=0, template_path=TEMPLATE_PATH, chunk_rows=CHUNK_ROWS):
+    """
+    Write a synthetic raw CSV of `n_rows` rows with the schema of the real export.
+
+    Rows are generated and appended `chunk_rows` at a time, so large files (10M rows) are written
+    with bounded memory. The output only depends on `n_rows`, `seed` and the template.
+    """
+
+    template = pd.read_csv(template_path)
+    rng = np.random.default_rng(seed)
+
+    tmp_path = file_path + ".tmp"
+    written = 0
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        while written < n_rows:
+            size = min(chunk_rows, n_rows - written)
+            chunk = synthetic_chunk(template, size, FIRST_SYNTHETIC_ID + written, rng)
+            chunk.to_csv(f, header=written == 0, index=False)
+            written += size
+    os.replace(tmp_path, file_path)
+    return file_path
+
+def synthetic_raw_path(n_rows, seed=0, data_dir="benchmarks/data"):
+    """Path of the synthetic raw CSV for (`n_rows`, `seed`), generating it on first use."""
+
+    os.makedirs(data_dir, exist_ok=True)
+    file_path = os.path.join(data_dir, f"zomato_{n_rows}_{seed}.csv")
+    if not os.path.exists(file_path):
+        write_synthetic_raw(file_path, n_rows, seed=seed)
+    return file_path
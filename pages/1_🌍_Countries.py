@@ -1,18 +1,23 @@
 # Libraries
-import pandas as pd
-import plotly.express as px
 import streamlit as st
 
 
-from utils.helpers import convert_string_label
+from utils.figures import cached_figure
+from utils.helpers import PRICE_MEASURES, convert_string_label, remove_unused_categories
+from utils.index import select_rows
+from utils.instrument import begin_run, instrumented, plotly_chart, span, timing_panel
+from utils.loader import NO_DATASET_MESSAGE, dataset_available, load_filter_index, load_rollup
+from utils.memo import cached_rollup_mean
+from utils.rollup import rollup_nunique
 
-def get_barplot_count_column_by_country(df, column, label):
+@instrumented
+def get_barplot_count_column_by_country(cube, column, label):
     """
     Generate a bar plot showing the count of unique values for a given column by country.
 
     Parameters:
-    - df (pandas.DataFrame): The DataFrame containing the data.
-    - column (str): The name of the column to count unique values for.
+    - cube (pandas.DataFrame): The rollup cube (see utils.rollup) for the selected countries.
+    - column (str): The name of the column to count unique values for ('restaurant_id' or a cube dimension).
     - label (str): The label to use for the y-axis of the plot.
 
     Returns:
@@ -21,10 +26,12 @@ def get_barplot_count_column_by_country(df, column, label):
 
 
     # Group the data by country and count the unique restaurant IDs
-    top_countries = (df.groupby('country')[column]
-                        .nunique()  # Count unique restaurant IDs
+    top_countries = (rollup_nunique(cube, 'country', column)
                         .sort_values(ascending=False)  # Sort in descending order
-                        .reset_index(name=label))
+                        .reset_index(name=label)
+                        .pipe(remove_unused_categories))
+
+    import plotly.express as px
 
     # Criar o gráfico de barras
     fig = px.bar(top_countries, x='country', y=label,
@@ -41,23 +48,50 @@ def get_barplot_count_column_by_country(df, column, label):
 
     return fig
 
-def calculate_average_metric_by_country(df, metric):
+@instrumented
+def calculate_average_metric_by_country(cube, metric, selection=None):
 
-    average_ratings = (df.groupby('country')[metric]
-                        .mean()
+    # Memoized per selection when it is given (see utils.memo)
+    average_ratings = (cached_rollup_mean(cube, 'country', metric, selection)
                         .sort_values(ascending=False)
-                        .reset_index(name = 'mean_' + metric))
+                        .reset_index(name = 'mean_' + metric)
+                        .pipe(remove_unused_categories))
     average_ratings['mean_' + metric] = round(average_ratings['mean_' + metric], 1)
     average_ratings.columns = ['Country', convert_string_label('mean_' + metric)]
     return average_ratings
 
+def get_average_metric_by_country_map(average_metric):
+    """Choropleth of a calculate_average_metric_by_country result."""
+
+    import plotly.express as px
+
+    return px.choropleth(average_metric,
+                         locations='Country',
+                         locationmode='country names',
+                         color=average_metric.columns[1],
+                         hover_name='Country',
+                         color_continuous_scale='Bluered_r')  # Color scale
+
+def get_average_metric_by_country_barplot(average_metric, color_scale):
+    """Bar plot of a calculate_average_metric_by_country result."""
+
+    import plotly.express as px
+
+    return px.bar(average_metric, x='Country', y=average_metric.columns[1],
+                  color=average_metric.columns[1],  # Color based on the mean metric
+                  color_continuous_scale=color_scale)  # Color palette
 
 def main():
 
     st.set_page_config(page_title="Countries", page_icon="🌍", layout="wide")
+    begin_run("Countries")
+
+    if not dataset_available():
+        st.error(NO_DATASET_MESSAGE)
+        st.stop()
 
     # Import Dataset
-    df = pd.read_csv("data/processed/data.csv")
+    cube = load_rollup()
 
     # ==============================================================================
     # Sidebar
@@ -65,12 +99,20 @@ def main():
     st.sidebar.markdown("## Filters")
     countries = st.sidebar.multiselect(
         "Choose the Countries You Want to View Information",
-        df.loc[:, "country"].unique().tolist(),
+        cube.loc[:, "country"].unique().tolist(),
         default=["Brazil", "England", "India", "South Africa", "Canada", "Australia"],
         )
 
+    price_measure = st.sidebar.radio("Price Measure", list(PRICE_MEASURES), format_func=PRICE_MEASURES.get,
+                                     help="Cost for two is converted to US dollars at the rates in data/currency_rates.csv.")
+
+    # Every chart below only depends on the selected countries, and the price charts on the price measure
+    selection = {"country": countries}
+    price_selection = dict(selection, price_measure=price_measure)
+
     # Filter by country
-    df_filtered = df[df['country'].isin(countries)]
+    with span("filter"):
+        cube_filtered = cube.take(select_rows(load_filter_index("rollup"), country=countries))
 
     # ==============================================================================
     # Sreamlit Layout
@@ -81,73 +123,67 @@ def main():
     with st.container():
 
         st.markdown('## Number of Restaurants by Country')
-        fig = get_barplot_count_column_by_country(df_filtered, 'restaurant_id', 'number_of_restaurants')
-        st.plotly_chart(fig, use_container_width=True)
+        fig = cached_figure("Countries", "restaurants_by_country", selection,
+                            lambda: get_barplot_count_column_by_country(cube_filtered, 'restaurant_id', 'number_of_restaurants'))
+        plotly_chart(fig, use_container_width=True)
 
     with st.container():
 
         st.markdown('## Number of Registered Cities by Country')
-        fig = get_barplot_count_column_by_country(df_filtered, 'city', 'number_of_cities')
-        st.plotly_chart(fig, use_container_width=True)
+        fig = cached_figure("Countries", "cities_by_country", selection,
+                            lambda: get_barplot_count_column_by_country(cube_filtered, 'city', 'number_of_cities'))
+        plotly_chart(fig, use_container_width=True)
 
     with st.container():
 
         st.markdown('## Average Rating of Restaurants by Country')
-        average_ratings = calculate_average_metric_by_country(df_filtered, 'aggregate_rating')
+        average_ratings = calculate_average_metric_by_country(cube_filtered, 'aggregate_rating', selection)
         
         col1, col2 = st.columns(2)
 
         with col1:
             # Create a choropleth map using Plotly Express
-            fig = px.choropleth(average_ratings, 
-                                locations='Country', 
-                                locationmode='country names',
-                                color='Mean Aggregate Rating',
-                                hover_name='Country',
-                                color_continuous_scale='Bluered_r')  # Color scale   
+            fig = cached_figure("Countries", "average_rating_map", selection,
+                                lambda: get_average_metric_by_country_map(average_ratings))
 
             # Show the map
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
             
         with col2:
 
             # Create a bar plot using Plotly Express
-            fig = px.bar(average_ratings, x='Country', y='Mean Aggregate Rating',
-                        color='Mean Aggregate Rating',  # Color based on mean aggregate rating
-                        color_continuous_scale='Bluered_r')  # Color palette
+            fig = cached_figure("Countries", "average_rating_bar", selection,
+                                lambda: get_average_metric_by_country_barplot(average_ratings, 'Bluered_r'))
 
             # Show the map
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
 
     with st.container():
 
-        st.markdown('## Average Price Rating of Restaurants by Country')        
-        average_price_ratings= calculate_average_metric_by_country(df_filtered, 'price_range')
+        st.markdown(f'## Average {PRICE_MEASURES[price_measure]} of Restaurants by Country')
+        average_price_ratings= calculate_average_metric_by_country(cube_filtered, price_measure, selection)
         
         col1, col2 = st.columns(2)
 
         with col1:
 
             # Create a choropleth map using Plotly Express
-            fig = px.choropleth(average_price_ratings, 
-                                locations='Country', 
-                                locationmode='country names',
-                                color='Mean Price Range',
-                                hover_name='Country',
-                                color_continuous_scale='Bluered_r')  # Color scale   
+            fig = cached_figure("Countries", "average_price_range_map", price_selection,
+                                lambda: get_average_metric_by_country_map(average_price_ratings))
 
             # Show the map
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
             
         with col2:
 
             # Create a bar plot using Plotly Express
-            fig = px.bar(average_price_ratings, x='Country', y='Mean Price Range',
-                        color='Mean Price Range',  # Color based on mean aggregate rating
-                        color_continuous_scale='Bluered')  # Color palette
+            fig = cached_figure("Countries", "average_price_range_bar", price_selection,
+                                lambda: get_average_metric_by_country_barplot(average_price_ratings, 'Bluered'))
 
             # Show the map
-            st.plotly_chart(fig, use_container_width=True)         
+            plotly_chart(fig, use_container_width=True)
+
+    timing_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,28 +1,38 @@
 # Libraries
-import pandas as pd
-import plotly.express as px
 import streamlit as st
 
-from utils.helpers import convert_string_label
-
-def generate_top_cities_by_mean_metric(df, metric, ascrending=True):
+from utils.figures import cached_figure
+from utils.helpers import PRICE_MEASURES, convert_string_label, remove_unused_categories
+from utils.index import select_rows
+from utils.instrument import begin_run, instrumented, plotly_chart, span, timing_panel
+from utils.loader import NO_DATASET_MESSAGE, dataset_available, load_filter_index, load_rollup
+from utils.memo import cached_rollup_mean
+from utils.rollup import rollup_nunique, rollup_rating_count
+from utils.topk import top_k_rows
+
+@instrumented
+def generate_top_cities_by_mean_metric(cube, metric, ascrending=True, selection=None):
     """
     Generates a bar plot showing the top 7 cities with the highest or lowest mean value of a given metric.
 
     Parameters:
-        df (pandas.DataFrame): The input DataFrame containing the data.
+        cube (pandas.DataFrame): The rollup cube (see utils.rollup) for the selected countries.
         metric (str): The name of the metric column to calculate the mean value for.
         ascrending (bool, optional): Whether to sort the cities in ascending or descending order based on the mean metric value. Defaults to True.
+        selection (dict, optional): The filters that produced `cube`; when given, the mean by city is memoized
+            and shared by the ascending and descending charts (see utils.memo).
 
     Returns:
         plotly.graph_objects.Figure: The generated bar plot showing the top 7 cities with the highest or lowest mean value of the given metric.
 
     """
 
-    mean_metric_by_city_country = (df.groupby(['city', 'country'])[metric].mean()
-                                                            .sort_values(ascending=ascrending)
+    mean_metric_by_city_country = (cached_rollup_mean(cube, ['city', 'country'], metric, selection)
+                                                            .pipe(top_k_rows, 7, ascending=ascrending)
                                                             .reset_index(name='mean_' + metric)
-                                                            .head(7))
+                                                            .pipe(remove_unused_categories))
+
+    import plotly.express as px
 
     # Create a bar plot using Plotly Express
     fig = px.bar(mean_metric_by_city_country, x='city', y='mean_' + metric,
@@ -33,16 +43,17 @@ def generate_top_cities_by_mean_metric(df, metric, ascrending=True):
 
     return fig
 
-def generate_top_cities_by_rating_count(df, above, value):
+@instrumented
+def generate_top_cities_by_rating_count(cube, above, value):
     """
     Generates a bar plot showing the top 7 cities with the highest or lowest count of restaurant IDs based on 
     the aggregate rating.
 
     Parameters:
-    - df (pandas.DataFrame): The input DataFrame containing the data.
-    - above (bool): Whether to filter the DataFrame for cities with an aggregate rating above or below 
+    - cube (pandas.DataFrame): The rollup cube (see utils.rollup) for the selected countries.
+    - above (bool): Whether to count restaurants with an aggregate rating above or below 
       the given value.
-    - value (float): The value to filter the DataFrame by.
+    - value (float): The rating threshold.
 
     Returns:
     - plotly.graph_objs.Figure: The generated bar plot showing the top 7 cities with the highest or lowest 
@@ -50,19 +61,14 @@ def generate_top_cities_by_rating_count(df, above, value):
 
     """
 
-    if above:
-        filtered_df = df[df['aggregate_rating'] >= value]
-    else:
-        filtered_df = df[df['aggregate_rating'] <= value]
-
-    count_agg_rating = (filtered_df
-                        .groupby(['city', 'country'])['restaurant_id']
-                        .count()
-                        .sort_values(ascending=False)
+    count_agg_rating = (rollup_rating_count(cube, ['city', 'country'], above, value)
+                        .pipe(top_k_rows, 7)
                         .reset_index(name='count')
-                        .head(7))
+                        .pipe(remove_unused_categories))
     
 
+    import plotly.express as px
+
     # Create a bar plot using Plotly Express
     fig = px.bar(count_agg_rating, x='city', y='count',
                 height=600,  # Adjust the height as needed
@@ -72,17 +78,18 @@ def generate_top_cities_by_rating_count(df, above, value):
 
     return fig
 
-def generate_top_cities_by_unique_cuisines(df):
+@instrumented
+def generate_top_cities_by_unique_cuisines(cube):
     """
     Generates a bar plot showing the top 10 cities with the highest number of unique cuisines.
 
     Parameters:
-    - df (pandas.DataFrame): The input DataFrame containing the data.
+    - cube (pandas.DataFrame): The rollup cube (see utils.rollup) for the selected countries.
 
     Returns:
     plotly.graph_objects.Figure: The generated bar plot showing the top 10 cities with the highest number of unique cuisines.
 
-    This function groups the input DataFrame by the 'city' and 'country' columns and calculates the number of unique cuisines for each combination. It then sorts the resulting DataFrame in descending order based on the number of unique cuisines and selects the top 10 rows.
+    This function groups the rollup cube by the 'city' and 'country' columns and calculates the number of unique cuisines for each combination. It then selects the 10 rows with the most unique cuisines, in descending order.
 
     The function then creates a bar plot using Plotly Express, where the 'city' column is used as the x-axis, the 'number_of_unique_cuisines' column is used as the y-axis, and the 'country' column is used to color the bars. The plot is labeled with appropriate names and category orders are set for the 'city' column.
 
@@ -90,12 +97,13 @@ def generate_top_cities_by_unique_cuisines(df):
     """
 
     # Group by 'city' and 'country' and calculate the number of unique cuisines
-    unique_cuisine_by_city = (df.groupby(['city', 'country'])['cuisines_']
-                               .nunique()
-                               .sort_values(ascending=False)
+    unique_cuisine_by_city = (rollup_nunique(cube, ['city', 'country'], 'cuisines_')
+                               .pipe(top_k_rows, 10)
                                .reset_index(name='number_of_unique_cuisines')
-                               .head(10))
+                               .pipe(remove_unused_categories))
     
+    import plotly.express as px
+
     # Create a bar plot using Plotly Express
     fig = px.bar(unique_cuisine_by_city, x='city', y='number_of_unique_cuisines',
                  height=600,  # Ajustar a altura conforme necessário
@@ -107,9 +115,14 @@ def generate_top_cities_by_unique_cuisines(df):
 
 def main():
     st.set_page_config(page_title="Cities", page_icon="🏙️", layout="wide")
+    begin_run("Cities")
+
+    if not dataset_available():
+        st.error(NO_DATASET_MESSAGE)
+        st.stop()
 
     # Import Dataset
-    df = pd.read_csv("data/processed/data.csv")
+    cube = load_rollup()
 
     # ==============================================================================
     # Sidebar
@@ -117,12 +130,20 @@ def main():
     st.sidebar.markdown("## Filters")
     countries = st.sidebar.multiselect(
         "Choose the Countries You Want to View Information",
-        df.loc[:, "country"].unique().tolist(),
+        cube.loc[:, "country"].unique().tolist(),
         default=["Brazil", "England", "India", "South Africa", "Canada", "Australia"],
         )
 
+    price_measure = st.sidebar.radio("Price Measure", list(PRICE_MEASURES), format_func=PRICE_MEASURES.get,
+                                     help="Cost for two is converted to US dollars at the rates in data/currency_rates.csv.")
+
+    # Every chart below only depends on the selected countries, and the price charts on the price measure
+    selection = {"country": countries}
+    price_selection = dict(selection, price_measure=price_measure)
+
     # Filter by country
-    df = df[df['country'].isin(countries)]
+    with span("filter"):
+        cube = cube.take(select_rows(load_filter_index("rollup"), country=countries))
 
     # ==============================================================================
     # Sreamlit Layout
@@ -136,27 +157,35 @@ def main():
 
         with tab1:
             st.markdown('### Top 7 Cities with the Highest Mean Aggregate Rating')
-            fig = generate_top_cities_by_mean_metric(df, 'aggregate_rating', ascrending=False)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = cached_figure("Cities", "top_mean_rating", selection,
+                                lambda: generate_top_cities_by_mean_metric(cube, 'aggregate_rating', ascrending=False,
+                                                                           selection=selection))
+            plotly_chart(fig, use_container_width=True)
 
         with tab2:
             st.markdown('### Top 7 Cities with the Lowest Mean Aggregate Rating')
-            fig = generate_top_cities_by_mean_metric(df, 'aggregate_rating', ascrending=True)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = cached_figure("Cities", "bottom_mean_rating", selection,
+                                lambda: generate_top_cities_by_mean_metric(cube, 'aggregate_rating', ascrending=True,
+                                                                           selection=selection))
+            plotly_chart(fig, use_container_width=True)
 
     with st.container():
 
         tab1, tab2 = st.columns(2)
 
         with tab1:
-            st.markdown('### Top 7 Cities with the Highest Mean Average Price Rating')
-            fig = generate_top_cities_by_mean_metric(df, 'price_range', ascrending=False)
-            st.plotly_chart(fig, use_container_width=True)
+            st.markdown(f'### Top 7 Cities with the Highest Mean {PRICE_MEASURES[price_measure]}')
+            fig = cached_figure("Cities", "top_mean_price_range", price_selection,
+                                lambda: generate_top_cities_by_mean_metric(cube, price_measure, ascrending=False,
+                                                                           selection=selection))
+            plotly_chart(fig, use_container_width=True)
 
         with tab2:
-            st.markdown('### Top 7 Cities with the Lowest Mean Average Price Rating')
-            fig = generate_top_cities_by_mean_metric(df, 'price_range', ascrending=True)
-            st.plotly_chart(fig, use_container_width=True)
+            st.markdown(f'### Top 7 Cities with the Lowest Mean {PRICE_MEASURES[price_measure]}')
+            fig = cached_figure("Cities", "bottom_mean_price_range", price_selection,
+                                lambda: generate_top_cities_by_mean_metric(cube, price_measure, ascrending=True,
+                                                                           selection=selection))
+            plotly_chart(fig, use_container_width=True)
 
     with st.container():
 
@@ -164,18 +193,23 @@ def main():
 
         with tab1:
             st.markdown('### Cities with the most restaurants with an average rating above 4')
-            fig = generate_top_cities_by_rating_count(df, above=True, value=4)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = cached_figure("Cities", "rating_above_4_count", selection,
+                                lambda: generate_top_cities_by_rating_count(cube, above=True, value=4))
+            plotly_chart(fig, use_container_width=True)
 
         with tab2:
             st.markdown('### Cities with the most restaurants with an average rating below 2.5')
-            fig = generate_top_cities_by_rating_count(df, above=False, value=2.5)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = cached_figure("Cities", "rating_below_2_5_count", selection,
+                                lambda: generate_top_cities_by_rating_count(cube, above=False, value=2.5))
+            plotly_chart(fig, use_container_width=True)
 
     with st.container():
         st.markdown('### Cities with more different types of cuisine')
-        fig = generate_top_cities_by_unique_cuisines(df)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = cached_figure("Cities", "unique_cuisines", selection,
+                            lambda: generate_top_cities_by_unique_cuisines(cube))
+        plotly_chart(fig, use_container_width=True)
+
+    timing_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,16 +1,32 @@
-import pandas as pd
-import plotly.express as px
+import numpy as np
 import streamlit as st
 
-from utils.helpers import convert_string_label
-
-def get_cuisines_mean_metric_barplot_fig(df, ascending, metric):
-
-    df_aux = (df.groupby('cuisines_')[metric]
-                                 .mean()
+from utils.figures import cached_figure
+from utils.helpers import PRICE_MEASURES, convert_string_label, remove_unused_categories
+from utils.cuisines import aggregate_by_cuisine, restaurants_with_cuisines
+from utils.index import select_rows
+from utils.instrument import begin_run, instrumented, plotly_chart, span, timing_panel
+from utils.loader import (
+    NO_DATASET_MESSAGE,
+    dataset_available,
+    load_cuisines,
+    load_dataset,
+    load_filter_index,
+    load_rollup,
+)
+from utils.memo import cached_rollup_mean, memoized
+from utils.topk import top_k_rows
+
+@instrumented
+def plot_cuisines_mean_metric(mean_by_cuisine, ascending, metric):
+
+    df_aux = (mean_by_cuisine.rename_axis('cuisines_')
                                  .sort_values(ascending=ascending)
-                                 .reset_index(name='mean_aggregate_rating'))
+                                 .reset_index(name='mean_aggregate_rating')
+                                 .pipe(remove_unused_categories))
             
+    import plotly.express as px
+
     # Create a bar plot using Plotly Express
     fig = px.bar(df_aux, x='cuisines_', y='mean_aggregate_rating',
                 labels={'cuisines_': convert_string_label('cuisines_'), 'mean_aggregate_rating': convert_string_label(metric)},
@@ -20,6 +36,32 @@ def get_cuisines_mean_metric_barplot_fig(df, ascending, metric):
 
     return fig
 
+@instrumented
+def get_cuisines_mean_metric_barplot_fig(cube, ascending, metric, selection=None):
+    return plot_cuisines_mean_metric(cached_rollup_mean(cube, 'cuisines_', metric, selection), ascending, metric)
+
+@instrumented
+def get_all_cuisines_mean_metric_barplot_fig(table, df, positions, cuisines, ascending, metric, selection=None):
+    """
+    Same chart as get_cuisines_mean_metric_barplot_fig, but every restaurant counts towards all of the
+    cuisines it offers instead of only its first one.
+
+    Parameters:
+    - table (dict): The restaurant <-> cuisine table (see utils.cuisines).
+    - df (pandas.DataFrame): The full processed dataset, in store order.
+    - positions (numpy.ndarray): Row positions of the selected restaurants.
+    - cuisines (list): Cuisines to show.
+    - ascending (bool): Sort order of the bars.
+    - metric (str): Column to average.
+    - selection (dict, optional): The filters that produced `positions`; when given, the means are memoized
+      (see utils.memo).
+    """
+
+    aggregate = lambda: aggregate_by_cuisine(table, df[metric].to_numpy(), positions=positions, cuisines=cuisines)
+    mean_by_cuisine = aggregate() if selection is None else memoized(("aggregate_by_cuisine", metric), selection, aggregate)
+    return plot_cuisines_mean_metric(mean_by_cuisine, ascending, metric)
+
+@instrumented
 def generate_top_cuisines_metrics(df, top_n):
     """
     Generates metrics for the top cuisines based on aggregate rating.
@@ -32,7 +74,7 @@ def generate_top_cuisines_metrics(df, top_n):
     This function does not return anything. It generates metrics for the top cuisines.
     """
 
-    df_cuisine = df.sort_values(by='aggregate_rating', ascending=False).head(top_n).reset_index(drop=True)
+    df_cuisine = top_k_rows(df, top_n, 'aggregate_rating').reset_index(drop=True)
 
     if len(df_cuisine) > 0:
 
@@ -58,9 +100,17 @@ def generate_top_cuisines_metrics(df, top_n):
 
 def main():
     st.set_page_config(page_title="Cuisines", page_icon="🍽️", layout="wide")
+    begin_run("Cuisines")
+
+    if not dataset_available():
+        st.error(NO_DATASET_MESSAGE)
+        st.stop()
 
     # Import Dataset
-    df = pd.read_csv("data/processed/data.csv")
+    df = load_dataset(columns=["restaurant_id", "restaurant_name", "country", "city", "cuisines_",
+                               "average_cost_for_two", "average_cost_for_two_usd", "price_range",
+                               "aggregate_rating", "votes"])
+    cuisine_table = load_cuisines()
 
     # ==============================================================================
     # Sidebar
@@ -73,9 +123,15 @@ def main():
         )
 
 
+    all_cuisines = st.sidebar.checkbox(
+        "Include secondary cuisines",
+        value=False,
+        help="Match and rank restaurants by every cuisine they offer, not only the first one listed.",
+        )
+
     cuisines = st.sidebar.multiselect(
         "Choose Types of Cuisine",
-        df.loc[:, "cuisines_"].unique().tolist(),
+        cuisine_table["categories"].tolist() if all_cuisines else df.loc[:, "cuisines_"].unique().tolist(),
         default=["Home-made", "BBQ", "Japanese", "Brazilian", "Arabian", "American", "Italian"],
         )
     
@@ -83,13 +139,28 @@ def main():
         "Select the number of Restaurants you want to view", 1, 20, 10
     )
 
+    price_measure = st.sidebar.radio("Price Measure", list(PRICE_MEASURES), format_func=PRICE_MEASURES.get,
+                                     help="Cost for two is converted to US dollars at the rates in data/currency_rates.csv.")
+
+    # The charts depend on these filters only, not on top_n
+    selection = {"country": countries, "cuisines_": cuisines, "all_cuisines": all_cuisines}
+    price_selection = dict(selection, price_measure=price_measure)
+
     # ==============================================================================
     # Sreamlit Layout
     # ==============================================================================
     st.markdown("# 🍽️ Cuisines Vision")
 
 
-    df_filtered = df[(df['country'].isin(countries)) & (df['cuisines_'].isin(cuisines))] 
+    with span("filter", all_cuisines=all_cuisines):
+        if all_cuisines:
+            positions = np.intersect1d(select_rows(load_filter_index(), country=countries),
+                                       restaurants_with_cuisines(cuisine_table, cuisines),
+                                       assume_unique=True)
+        else:
+            positions = select_rows(load_filter_index(), country=countries, cuisines_=cuisines)
+            cube_filtered = load_rollup().take(select_rows(load_filter_index("rollup"), country=countries, cuisines_=cuisines))
+        df_filtered = df.take(positions)
     if len(df_filtered) < top_n:
         top_n = len(df_filtered)
 
@@ -99,27 +170,43 @@ def main():
 
         st.markdown(f"## Top {top_n} Restaurants with Highest Mean Aggregate Rating")     
         
-        selected_columns = ['restaurant_name', 'country', 'city', 'cuisines_', 'average_cost_for_two', 'votes']
+        selected_columns = ['restaurant_name', 'country', 'city', 'cuisines_', 'average_cost_for_two',
+                            'average_cost_for_two_usd', 'votes']
 
-        st.dataframe(df_filtered
-                     .groupby(selected_columns)['aggregate_rating']
-                     .mean()
-                     .sort_values(ascending=False)
-                     .reset_index(name='mean_aggregate_rating')
-                     .head(top_n))
+        with span("top_restaurants_table"):
+            st.dataframe(df_filtered
+                         .groupby(selected_columns, observed=True, sort=False)['aggregate_rating']
+                         .mean()
+                         .pipe(top_k_rows, top_n)
+                         .reset_index(name='mean_aggregate_rating'))
 
     with st.container():
 
         st.markdown(f"### Mean Aggregate Rating by Cuisines")
-        fig = get_cuisines_mean_metric_barplot_fig(df_filtered, ascending=False, metric='aggregate_rating')
-        st.plotly_chart(fig, use_container_width=True)
+        if all_cuisines:
+            build = lambda: get_all_cuisines_mean_metric_barplot_fig(cuisine_table, df, positions, cuisines,
+                                                                     ascending=False, metric='aggregate_rating',
+                                                                     selection=selection)
+        else:
+            build = lambda: get_cuisines_mean_metric_barplot_fig(cube_filtered, ascending=False, metric='aggregate_rating',
+                                                                 selection=selection)
+        fig = cached_figure("Cuisines", "mean_rating_by_cuisine", selection, build)
+        plotly_chart(fig, use_container_width=True)
 
     with st.container():
 
-        st.markdown(f"### Price Range by Cuisines")
-        fig = get_cuisines_mean_metric_barplot_fig(df_filtered, ascending=False, metric='price_range')
-        st.plotly_chart(fig, use_container_width=True)
-
+        st.markdown(f"### {PRICE_MEASURES[price_measure]} by Cuisines")
+        if all_cuisines:
+            build = lambda: get_all_cuisines_mean_metric_barplot_fig(cuisine_table, df, positions, cuisines,
+                                                                     ascending=False, metric=price_measure,
+                                                                     selection=selection)
+        else:
+            build = lambda: get_cuisines_mean_metric_barplot_fig(cube_filtered, ascending=False, metric=price_measure,
+                                                                 selection=selection)
+        fig = cached_figure("Cuisines", "mean_price_range_by_cuisine", price_selection, build)
+        plotly_chart(fig, use_container_width=True)
+
+    timing_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
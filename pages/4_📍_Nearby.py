@@ -0,0 +1,141 @@
+import streamlit as st
+
+from utils.helpers import remove_unused_categories
+from utils.instrument import begin_run, instrumented, plotly_chart, span, timing_panel
+from utils.loader import (
+    NO_DATASET_MESSAGE,
+    cached_artifact,
+    dataset_available,
+    load_cuisines,
+    load_dataset,
+    load_spatial_index,
+)
+from utils.spatial import nearest, query_radius, restaurant_filter
+
+RESULT_COLUMNS = ["restaurant_name", "country", "city", "cuisines", "price_type", "aggregate_rating",
+                  "average_cost_for_two", "currency", "average_cost_for_two_usd", "latitude", "longitude"]
+
+PRICE_TYPES = ["cheap", "normal", "expensive", "gourmet"]
+
+def load_city_centers():
+    """Median coordinates of the restaurants of every city, computed once per dataset version."""
+
+    def build():
+        df = load_dataset(columns=["country", "city", "latitude", "longitude"])
+        return (df.groupby(["country", "city"], observed=True)[["latitude", "longitude"]]
+                  .median()
+                  .reset_index())
+
+    return cached_artifact("city_centers", build)
+
+@instrumented
+def get_nearby_map(results, latitude, longitude):
+    """
+    Map of the found restaurants around the searched point.
+
+    Parameters:
+    - results (pandas.DataFrame): The found restaurants with their coordinates and distance_km.
+    - latitude (float), longitude (float): The searched point.
+
+    Returns:
+    - plotly.graph_objs.Figure: The map.
+    """
+
+    import plotly.express as px
+
+    fig = px.scatter_mapbox(results, lat='latitude', lon='longitude',
+                            hover_name='restaurant_name',
+                            hover_data={'cuisines': True, 'aggregate_rating': True, 'distance_km': True,
+                                        'latitude': False, 'longitude': False},
+                            color='aggregate_rating',
+                            color_continuous_scale='Bluered_r',
+                            range_color=(0, 5),
+                            labels={'aggregate_rating': 'Aggregate Rating', 'distance_km': 'Distance (km)',
+                                    'cuisines': 'Cuisines'},
+                            height=600)
+
+    # Mark the searched point
+    fig.add_scattermapbox(lat=[latitude], lon=[longitude], mode='markers', marker={'size': 14, 'color': 'black'},
+                          name='Searched point', hoverinfo='name', showlegend=False)
+    fig.update_layout(mapbox_style='open-street-map',
+                      mapbox_center={'lat': latitude, 'lon': longitude},
+                      mapbox_zoom=12,
+                      margin={'l': 0, 'r': 0, 't': 0, 'b': 0})
+
+    return fig
+
+def main():
+    st.set_page_config(page_title="Nearby", page_icon="📍", layout="wide")
+    begin_run("Nearby")
+
+    if not dataset_available():
+        st.error(NO_DATASET_MESSAGE)
+        st.stop()
+
+    cuisine_table = load_cuisines()
+    centers = load_city_centers()
+
+    # ==============================================================================
+    # Sidebar
+    # ==============================================================================
+    st.sidebar.markdown("## Location")
+    labels = (centers["city"].astype(str) + ", " + centers["country"].astype(str)).tolist()
+    city = st.sidebar.selectbox("Start from a City", labels,
+                                index=labels.index("New Delhi, India") if "New Delhi, India" in labels else 0)
+    center = centers.iloc[labels.index(city)]
+
+    # Keyed by city, so picking another city moves the point to it
+    latitude = st.sidebar.number_input("Latitude", -90.0, 90.0, float(center["latitude"]), step=0.001,
+                                       format="%.5f", key=f"latitude_{city}")
+    longitude = st.sidebar.number_input("Longitude", -180.0, 180.0, float(center["longitude"]), step=0.001,
+                                        format="%.5f", key=f"longitude_{city}")
+
+    mode = st.sidebar.radio("Search", ["Nearest restaurants", "Within a radius"])
+    if mode == "Nearest restaurants":
+        k = st.sidebar.slider("Number of restaurants", 1, 50, 10)
+    else:
+        radius_km = st.sidebar.slider("Radius (km)", 0.5, 50.0, 2.0, step=0.5)
+
+    st.sidebar.markdown("## Filters")
+    cuisines = st.sidebar.multiselect("Types of Cuisine (all when empty)", cuisine_table["categories"].tolist())
+    price_types = st.sidebar.multiselect("Price Types (all when empty)", PRICE_TYPES)
+    min_rating = st.sidebar.slider("Minimum Aggregate Rating", 0.0, 5.0, 0.0, step=0.1)
+
+    # ==============================================================================
+    # Sreamlit Layout
+    # ==============================================================================
+    st.markdown("# 📍 Nearby Restaurants")
+
+    with span("spatial_query", mode=mode):
+        keep = restaurant_filter(load_dataset(columns=["price_range", "aggregate_rating"]),
+                                 cuisine_table=cuisine_table,
+                                 cuisines=cuisines or None,
+                                 price_types=price_types or None,
+                                 min_rating=min_rating or None)
+        if mode == "Nearest restaurants":
+            positions, distances = nearest(load_spatial_index(), latitude, longitude, k, keep=keep)
+        else:
+            positions, distances = query_radius(load_spatial_index(), latitude, longitude, radius_km, keep=keep)
+
+    results = (load_dataset(columns=RESULT_COLUMNS)
+               .take(positions)
+               .assign(distance_km=distances.round(2))
+               .reset_index(drop=True)
+               .pipe(remove_unused_categories))
+
+    if len(results) == 0:
+        st.info("No restaurant matches these filters around this point.")
+        timing_panel()
+        return
+
+    st.markdown(f"## {len(results):,} Restaurants, up to {results['distance_km'].max():,.2f} km Away")
+
+    fig = get_nearby_map(results, latitude, longitude)
+    plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(results.drop(columns=["latitude", "longitude"]), hide_index=True, use_container_width=True)
+
+    timing_panel()
+
+if __name__ == "__main__":
+    main()
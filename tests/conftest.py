@@ -0,0 +1,11 @@
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    """Data paths are relative to the repository root, like when the dashboard runs."""
+
+    monkeypatch.chdir(ROOT)
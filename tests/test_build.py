@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from utils.build import publish
+from utils.helpers import artifact_paths, current_version
+
+def writer(content, status="rebuilt"):
+    """A build that writes `content` to the store the way the ETL does: through a temporary file."""
+
+    def build(paths):
+        tmp_path = paths["store"] + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, paths["store"])
+        return status
+
+    return build
+
+def read_store(version, versions_dir):
+    with open(artifact_paths(version, str(versions_dir))["store"]) as f:
+        return f.read()
+
+def versions(versions_dir):
+    return sorted(name for name in os.listdir(versions_dir) if not name.startswith("."))
+
+@pytest.fixture
+def publish_to(tmp_path):
+    def run(build, keep=2):
+        return publish(build, versions_dir=str(tmp_path / "versions"), current_path=str(tmp_path / "CURRENT"),
+                       keep=keep)
+
+    return run
+
+def test_publishing_switches_current_and_leaves_the_previous_version_intact(tmp_path, publish_to):
+    status, first = publish_to(writer("first"))
+    assert status == "rebuilt"
+    assert current_version(str(tmp_path / "CURRENT")) == first
+
+    seen = {}
+
+    def append(paths):
+        # A new version starts from the files of the published one.
+        with open(paths["store"]) as f:
+            seen["store"] = f.read()
+        return writer(seen["store"] + " second", "appended")(paths)
+
+    status, second = publish_to(append)
+    assert (status, seen["store"]) == ("appended", "first")
+    assert second > first
+    assert current_version(str(tmp_path / "CURRENT")) == second
+    assert read_store(second, tmp_path / "versions") == "first second"
+    assert read_store(first, tmp_path / "versions") == "first"
+
+def test_an_unchanged_build_keeps_the_published_version(tmp_path, publish_to):
+    _, first = publish_to(writer("first"))
+
+    assert publish_to(lambda paths: "unchanged") == ("unchanged", first)
+    assert current_version(str(tmp_path / "CURRENT")) == first
+    assert versions(tmp_path / "versions") == [first]
+
+def test_old_versions_are_pruned_to_keep_versions(tmp_path, publish_to):
+    published = [publish_to(writer(str(i)), keep=2)[1] for i in range(4)]
+
+    assert versions(tmp_path / "versions") == published[-2:]
+    assert current_version(str(tmp_path / "CURRENT")) == published[-1]
+
+def test_a_failed_build_publishes_nothing(tmp_path, publish_to):
+    _, first = publish_to(writer("first"))
+
+    def fail(paths):
+        writer("partial")(paths)
+        raise RuntimeError("build failed")
+
+    with pytest.raises(RuntimeError):
+        publish_to(fail)
+    assert current_version(str(tmp_path / "CURRENT")) == first
+    assert versions(tmp_path / "versions") == [first]
+    assert read_store(first, tmp_path / "versions") == "first"
+    assert not [name for name in os.listdir(tmp_path / "versions") if name.startswith(".staging-")]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cuisines import aggregate_by_cuisine, build_cuisine_table, merge_cuisine_tables, restaurants_with_cuisines
+
+CUISINES = pd.Series(["Italian, Pizza", "Japanese", "Pizza,  Italian, Pizza", np.nan, "BBQ, Japanese, Sushi",
+                      "Italian", "", "Sushi"])
+VALUES = np.array([4.0, 3.0, 2.0, 5.0, 1.0, 4.5, 3.5, 2.5])
+
+def pairs(cuisines):
+    """(row, cuisine) pairs of every cuisine a row offers, computed row by row."""
+
+    return pd.DataFrame([(row, cuisine) for row, offered in enumerate(cuisines) if isinstance(offered, str)
+                         for cuisine in dict.fromkeys(c.strip() for c in offered.split(",")) if cuisine],
+                        columns=["row", "cuisine"])
+
+def test_the_table_lists_every_cuisine_of_every_row():
+    table = build_cuisine_table(CUISINES)
+    expected = pairs(CUISINES)
+
+    assert list(table["categories"]) == sorted(expected["cuisine"].unique())
+    for row in range(len(CUISINES)):
+        offered = table["categories"][table["codes"][table["offsets"][row]:table["offsets"][row + 1]]]
+        assert sorted(offered) == sorted(expected.loc[expected["row"] == row, "cuisine"])
+
+@pytest.mark.parametrize("cuisines", [["Pizza"], ["Sushi", "Italian"], ["Vegan"], []])
+def test_restaurants_with_cuisines_matches_a_row_by_row_scan(cuisines):
+    expected = pairs(CUISINES)
+    np.testing.assert_array_equal(restaurants_with_cuisines(build_cuisine_table(CUISINES), cuisines),
+                                  np.unique(expected.loc[expected["cuisine"].isin(cuisines), "row"]))
+
+@pytest.mark.parametrize("how", ["mean", "sum", "count"])
+@pytest.mark.parametrize("positions", [None, [0, 2, 4, 7], [5]])
+@pytest.mark.parametrize("cuisines", [None, ["Pizza", "Sushi"]])
+def test_aggregate_by_cuisine_matches_a_groupby_of_the_pairs(how, positions, cuisines):
+    expected = pairs(CUISINES)
+    if positions is not None:
+        expected = expected[expected["row"].isin(positions)]
+    if cuisines is not None:
+        expected = expected[expected["cuisine"].isin(cuisines)]
+    grouped = pd.Series(VALUES[expected["row"]], index=expected["cuisine"]).groupby(level=0)
+    expected = grouped.size().astype(np.float64) if how == "count" else grouped.agg(how)
+
+    result = aggregate_by_cuisine(build_cuisine_table(CUISINES), VALUES, positions=positions, cuisines=cuisines,
+                                  how=how)
+    pd.testing.assert_series_equal(result, expected, check_names=False, check_index_type=False)
+
+def test_merged_tables_equal_the_table_of_all_rows():
+    table = build_cuisine_table(CUISINES)
+    merged = merge_cuisine_tables([build_cuisine_table(CUISINES[:3]), build_cuisine_table(CUISINES[3:])])
+    for field in table:
+        np.testing.assert_array_equal(merged[field], table[field])
@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.build import RAW_DATA_PATH
+from utils.cuisines import load_cuisine_table
+from utils.helpers import (
+    ARTIFACT_FILES,
+    artifact_paths,
+    current_version,
+    load_currency_rates,
+    load_data,
+    optimize_dtypes,
+    process_data,
+    push_merged,
+    update_processed_data,
+    usd_costs,
+)
+from utils.sketch import load_sketches
+
+def load_artifacts(paths):
+    return {
+        "store": load_data(file_path=paths["store"]),
+        "rollup": load_data(file_path=paths["rollup"]),
+        "cuisines": load_cuisine_table(paths["cuisines"]),
+        "sketches": load_sketches(paths["sketches"]),
+    }
+
+def run_etl(directory, raw_path, **kwargs):
+    """update_processed_data with every artifact in `directory`; returns its status and the artifacts."""
+
+    paths = {name: str(directory / file_name) for name, file_name in ARTIFACT_FILES.items()}
+    status = update_processed_data(raw_path, paths["store"], manifest_path=paths["manifest"],
+                                   rollup_path=paths["rollup"], cuisines_path=paths["cuisines"],
+                                   sketches_path=paths["sketches"], **kwargs)
+    return status, load_artifacts(paths)
+
+def assert_same_artifacts(a, b):
+    pd.testing.assert_frame_equal(a["store"], b["store"])
+    pd.testing.assert_frame_equal(a["rollup"], b["rollup"])
+    for field in a["cuisines"]:
+        np.testing.assert_array_equal(a["cuisines"][field], b["cuisines"][field])
+    for name in a["sketches"]:
+        pd.testing.assert_frame_equal(a["sketches"][name]["keys"], b["sketches"][name]["keys"])
+        for field in ("registers", "exact", "hashes", "offsets"):
+            np.testing.assert_array_equal(a["sketches"][name][field], b["sketches"][name][field])
+
+def test_process_data_writes_every_artifact_next_to_output_path(tmp_path):
+    defaults = {path: os.stat(path).st_mtime_ns for path in artifact_paths().values() if os.path.exists(path)}
+    output_path = str(tmp_path / "data.parquet")
+
+    df = process_data(RAW_DATA_PATH, output_path)
+
+    assert len(df) > 0
+    assert sorted(os.listdir(tmp_path)) == sorted(ARTIFACT_FILES.values())
+    assert {path: os.stat(path).st_mtime_ns for path in defaults} == defaults
+
+def test_push_merged_keeps_a_logarithmic_stack():
+    stack = []
+    for part in range(1, 1001):
+        push_merged(stack, part, sum)
+        assert len(stack) <= int(np.log2(part)) + 1
+    assert sum(part for _, part in stack) == sum(range(1, 1001))
+    assert sum(count for count, _ in stack) == 1000
+
+def test_chunked_run_matches_a_single_pass(tmp_path):
+    (tmp_path / "full").mkdir()
+    (tmp_path / "chunked").mkdir()
+
+    _, full = run_etl(tmp_path / "full", RAW_DATA_PATH)
+    _, chunked = run_etl(tmp_path / "chunked", RAW_DATA_PATH, chunksize=300)
+
+    assert_same_artifacts(full, chunked)
+
+def test_appended_rows_are_merged_and_an_unchanged_file_is_skipped(tmp_path):
+    raw = tmp_path / "raw.csv"
+    lines = open(RAW_DATA_PATH, "rb").read().splitlines(keepends=True)
+    for directory in ("full", "incremental"):
+        (tmp_path / directory).mkdir()
+    _, expected = run_etl(tmp_path / "full", RAW_DATA_PATH)
+
+    raw.write_bytes(b"".join(lines[:4000]))
+    status, _ = run_etl(tmp_path / "incremental", str(raw))
+    assert status == "rebuilt"
+
+    raw.write_bytes(b"".join(lines))
+    status, appended = run_etl(tmp_path / "incremental", str(raw))
+    assert status == "appended"
+    assert_same_artifacts(expected, appended)
+
+    stat = os.stat(tmp_path / "incremental" / ARTIFACT_FILES["store"])
+    os.utime(raw)
+    status, _ = run_etl(tmp_path / "incremental", str(raw))
+    assert status == "unchanged"
+    assert os.stat(tmp_path / "incremental" / ARTIFACT_FILES["store"]).st_mtime_ns == stat.st_mtime_ns
+
+def test_a_rewritten_file_is_rebuilt(tmp_path):
+    raw = tmp_path / "raw.csv"
+    lines = open(RAW_DATA_PATH, "rb").read().splitlines(keepends=True)
+    for directory in ("fresh", "incremental"):
+        (tmp_path / directory).mkdir()
+    raw.write_bytes(b"".join(lines[:4000]))
+    run_etl(tmp_path / "incremental", str(raw))
+
+    # Same rows in another order: neither unchanged nor an append.
+    raw.write_bytes(b"".join(lines[:1] + lines[2001:4000] + lines[1:2001]))
+    _, expected = run_etl(tmp_path / "fresh", str(raw))
+    status, rebuilt = run_etl(tmp_path / "incremental", str(raw))
+
+    assert status == "rebuilt"
+    assert_same_artifacts(expected, rebuilt)
+
+def test_usd_costs_convert_by_country_and_round_to_the_cent():
+    rates = load_currency_rates()
+    costs = pd.Series([1000, 200, 300000, 40])
+    # India (INR), Brazil (BRL), Indonesia (IDR) and the United States (USD).
+    country_codes = pd.Series([1, 30, 94, 216])
+
+    pd.testing.assert_series_equal(usd_costs(costs, country_codes, rates), pd.Series([11.99, 35.78, 18.33, 40.0]))
+
+def test_usd_costs_reject_a_country_without_a_rate():
+    with pytest.raises(KeyError):
+        usd_costs(pd.Series([100]), pd.Series([999]), load_currency_rates())
+
+def test_the_store_holds_the_usd_cost_of_every_restaurant():
+    df = load_data(columns=["average_cost_for_two", "country_code", "average_cost_for_two_usd"],
+                   file_path=artifact_paths(current_version())["store"])
+    expected = usd_costs(df["average_cost_for_two"].astype(np.float64), df["country_code"], load_currency_rates())
+    np.testing.assert_array_equal(df["average_cost_for_two_usd"].to_numpy(), expected.to_numpy())
+
+def test_optimize_dtypes_rejects_integers_that_do_not_fit():
+    df = load_data(file_path=artifact_paths(current_version())["store"]).head(3)
+    for column in df.select_dtypes("category"):
+        df[column] = df[column].astype(str)
+    df["votes"] = df["votes"].astype("int64")
+    assert optimize_dtypes(df)["votes"].dtype == np.int32
+
+    df.loc[df.index[1], "votes"] = 2 ** 31
+    with pytest.raises(ValueError, match="votes"):
+        optimize_dtypes(df)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.index import build_filter_index, select_rows
+
+def expected_rows(df, **selections):
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in selections.items():
+        if values is not None:
+            mask &= df[column].isin(values).to_numpy()
+    return np.flatnonzero(mask)
+
+@pytest.fixture(params=["category", "object"])
+def df(request):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "country": rng.choice(["Brazil", "India", "Qatar", None], 2000),
+        "cuisines_": rng.choice(["BBQ", "Italian", "Japanese", "Arabian", "Home-made"], 2000),
+    })
+    return df.astype(request.param)
+
+def test_every_category_lists_its_rows_in_order(df):
+    index = build_filter_index(df)
+
+    assert index["n_rows"] == len(df)
+    for column in ["country", "cuisines_"]:
+        entry = index[column]
+        for code, category in enumerate(entry["categories"]):
+            rows = entry["positions"][entry["offsets"][code]:entry["offsets"][code + 1]]
+            np.testing.assert_array_equal(rows, np.flatnonzero((df[column] == category).to_numpy()))
+        # Rows with a missing value are in no category.
+        assert entry["offsets"][-1] == df[column].notna().sum()
+
+@pytest.mark.parametrize("selections", [
+    {},
+    {"country": None, "cuisines_": None},
+    {"country": ["India"]},
+    {"country": ["India", "Qatar"], "cuisines_": ["BBQ", "Japanese"]},
+    {"country": ["Brazil"], "cuisines_": None},
+    {"country": ["Narnia"]},
+    {"country": [], "cuisines_": ["BBQ"]},
+])
+def test_select_rows_matches_a_boolean_mask(df, selections):
+    np.testing.assert_array_equal(select_rows(build_filter_index(df), **selections), expected_rows(df, **selections))
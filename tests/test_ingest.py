@@ -0,0 +1,54 @@
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from test_helpers import assert_same_artifacts, load_artifacts, run_etl
+from utils.build import RAW_DATA_PATH
+from utils.helpers import ARTIFACT_FILES, read_manifest
+from utils.ingest import ingest_raw_files, ordered_results
+
+def test_ordered_results_keep_order_and_a_bounded_window():
+    submitted = []
+    lock = threading.Lock()
+
+    def work(item):
+        with lock:
+            submitted.append(item)
+        time.sleep(0.001 * (item % 3))
+        return item * 2
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = []
+        for result in ordered_results(executor, work, range(20), window=3):
+            # Besides the result being consumed, at most `window` tasks were submitted ahead of it.
+            assert len(submitted) <= len(results) + 1 + 3
+            results.append(result)
+
+    assert results == [item * 2 for item in range(20)]
+
+def test_ingest_matches_the_concatenated_files(tmp_path):
+    raw = pd.read_csv(RAW_DATA_PATH)
+    # The last file repeats restaurants of the second one, which must keep their first occurrence.
+    files = [raw.iloc[:3000], raw.iloc[3000:5000], pd.concat([raw.iloc[4500:4600], raw.iloc[5000:]])]
+    for directory in ("src", "single", "ingested"):
+        (tmp_path / directory).mkdir()
+    for i, frame in enumerate(files):
+        frame.to_csv(tmp_path / "src" / f"{i}.csv", index=False)
+    pd.concat(files).to_csv(tmp_path / "all.csv", index=False)
+
+    _, expected = run_etl(tmp_path / "single", str(tmp_path / "all.csv"))
+    paths = {name: str(tmp_path / "ingested" / file_name) for name, file_name in ARTIFACT_FILES.items()}
+    ingest = functools.partial(ingest_raw_files, str(tmp_path / "src"), workers=2, output_path=paths["store"],
+                               manifest_path=paths["manifest"], rollup_path=paths["rollup"],
+                               cuisines_path=paths["cuisines"], sketches_path=paths["sketches"], chunksize=700)
+
+    assert ingest() == "rebuilt"
+    assert_same_artifacts(expected, load_artifacts(paths))
+    expected_rejected = read_manifest(str(tmp_path / "single" / "manifest.json"))["rejected_ids"]
+    assert read_manifest(paths["manifest"])["rejected_ids"] == expected_rejected
+    assert sorted(os.listdir(tmp_path / "ingested")) == sorted(ARTIFACT_FILES.values())
+    assert ingest() == "unchanged"
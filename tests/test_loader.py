@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from utils.loader import load_dataset
+
+def test_in_place_writes_never_reach_the_cache():
+    df = load_dataset()
+    for column in df.columns:
+        expected = load_dataset(columns=[column])[column].astype(str).tolist()
+        returned = load_dataset(columns=[column])
+        stored = not isinstance(returned[column].array, pd.arrays.ArrowStringArray)
+        try:
+            returned.iloc[0, 0] = returned.iloc[1, 0]
+        except (ValueError, TypeError):
+            pass
+        else:
+            # Only Arrow strings (private wrappers) and derived columns (computed per call) accept writes.
+            assert not stored or column in ("country", "price_type", "color_name"), column
+        assert load_dataset(columns=[column])[column].astype(str).tolist() == expected, column
+
+@pytest.mark.parametrize("column", ["restaurant_id", "aggregate_rating", "city", "cuisines_"])
+def test_in_place_write_to_a_cached_column_raises(column):
+    returned = load_dataset(columns=[column])
+    with pytest.raises(ValueError):
+        returned.iloc[0, 0] = returned.iloc[1, 0]
@@ -0,0 +1,51 @@
+from utils.lru import lru_clear, lru_get, lru_put, lru_stats, new_lru
+
+def test_least_recently_used_entries_are_evicted_to_fit_the_byte_budget():
+    cache = new_lru(100)
+    lru_put(cache, "a", "A", 40)
+    lru_put(cache, "b", "B", 40)
+    assert lru_get(cache, "a") == "A"  # "b" is now the least recently used
+
+    lru_put(cache, "c", "C", 40)
+
+    assert lru_get(cache, "b") is None
+    assert lru_get(cache, "a") == "A" and lru_get(cache, "c") == "C"
+    assert lru_stats(cache) == {"hits": 3, "misses": 1, "evictions": 1, "hit_rate": 0.75, "entries": 2,
+                                "bytes": 80, "max_bytes": 100}
+
+def test_replacing_an_entry_replaces_its_size():
+    cache = new_lru(100)
+    lru_put(cache, "a", "A", 60)
+    lru_put(cache, "a", "AA", 30)
+
+    assert lru_get(cache, "a") == "AA"
+    assert lru_stats(cache)["bytes"] == 30
+    assert lru_stats(cache)["evictions"] == 0
+
+def test_a_value_larger_than_the_budget_is_not_cached_and_evicts_nothing():
+    cache = new_lru(100)
+    lru_put(cache, "a", "A", 60)
+
+    assert lru_put(cache, "big", "BIG", 101) == "BIG"
+
+    assert lru_get(cache, "big") is None
+    assert lru_get(cache, "a") == "A"
+    assert lru_stats(cache)["bytes"] == 60
+
+def test_one_entry_can_evict_several():
+    cache = new_lru(100)
+    for key in "abcd":
+        lru_put(cache, key, key.upper(), 25)
+    lru_put(cache, "e", "E", 70)
+
+    assert [key for key in "abcde" if lru_get(cache, key) is not None] == ["d", "e"]
+    assert lru_stats(cache)["bytes"] == 95
+    assert lru_stats(cache)["evictions"] == 3
+
+def test_clear_empties_the_cache():
+    cache = new_lru(100)
+    lru_put(cache, "a", "A", 60)
+    lru_clear(cache)
+
+    assert lru_get(cache, "a") is None
+    assert lru_stats(cache)["bytes"] == 0 and lru_stats(cache)["entries"] == 0
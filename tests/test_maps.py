@@ -0,0 +1,54 @@
+import folium.plugins
+import pytest
+
+from utils.loader import load_dataset
+from utils.maps import DETAIL_ZOOM, MAP_COLUMNS, build_map
+
+@pytest.fixture
+def restaurants():
+    return load_dataset(columns=MAP_COLUMNS)
+
+def elements(element):
+    for child in element._children.values():
+        yield child
+        yield from elements(child)
+
+def layers(m):
+    """Marker clusters and zoom cluster elements of a map, by the name of their layer."""
+
+    fast = {e.layer_name: e for e in elements(m) if isinstance(e, folium.plugins.FastMarkerCluster)}
+    zoomed = {e._parent.layer_name: e for e in elements(m) if hasattr(e, "levels")}
+    return fast, zoomed
+
+def assert_levels_cover(element, n):
+    assert sorted(element.levels) == list(range(DETAIL_ZOOM))
+    for rows in element.levels.values():
+        assert sum(row[2] for row in rows) == n
+
+def test_every_restaurant_is_a_marker_up_to_the_cap(restaurants):
+    fast, zoomed = layers(build_map(restaurants, max_markers=len(restaurants)))
+
+    assert len(fast["Restaurants"].data) == len(restaurants)
+    assert zoomed == {}
+
+def test_above_the_cap_clusters_cover_every_zoom_level_and_restaurants_stay_reachable(restaurants):
+    fast, zoomed = layers(build_map(restaurants, max_markers=len(restaurants) - 1))
+
+    assert fast == {}
+    assert_levels_cover(zoomed["Restaurants"], len(restaurants))
+    # Zoomed in to DETAIL_ZOOM, every restaurant can be shown individually.
+    assert len(zoomed["Restaurants"].markers) == len(restaurants)
+    # Clusters get finer as the map is zoomed in.
+    sizes = [len(zoomed["Restaurants"].levels[zoom]) for zoom in range(DETAIL_ZOOM)]
+    assert sizes == sorted(sizes) and sizes[0] < sizes[-1]
+
+def test_restaurants_outside_the_bounds_are_clustered(restaurants):
+    bounds = ((-60, -120), (60, 60))
+    inside = restaurants["latitude"].between(-60, 60) & restaurants["longitude"].between(-120, 60)
+    assert 0 < inside.sum() < len(restaurants)
+
+    fast, zoomed = layers(build_map(restaurants, max_markers=len(restaurants), bounds=bounds))
+
+    assert len(fast["Restaurants"].data) == inside.sum()
+    assert zoomed["Other areas"].markers is None
+    assert_levels_cover(zoomed["Other areas"], (~inside).sum())
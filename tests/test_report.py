@@ -0,0 +1,9 @@
+import pytest
+
+from utils.report import export_reports
+
+@pytest.mark.parametrize("countries, message", [([], "No countries"), (["Narnia"], "Unknown countries")])
+def test_invalid_country_selections_are_rejected(tmp_path, countries, message):
+    with pytest.raises(ValueError, match=message):
+        export_reports(str(tmp_path), countries=countries)
+    assert not any(tmp_path.iterdir())
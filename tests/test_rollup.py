@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.loader import load_dataset, load_rollup
+from utils.rollup import build_rollup, merge_rollups, rollup_count, rollup_mean, rollup_nunique, rollup_rating_count
+
+BYS = ["country", ["city", "country"], "cuisines_", ["country", "price_range"]]
+
+def assert_same(result, expected, **kwargs):
+    # The cube keeps price_range as int64, the store as int8.
+    pd.testing.assert_series_equal(result, expected, check_names=False, check_index_type=False, **kwargs)
+
+@pytest.fixture
+def df():
+    return load_dataset()
+
+@pytest.fixture
+def cube():
+    return load_rollup()
+
+@pytest.mark.parametrize("by", BYS)
+def test_counts_match_a_groupby_of_the_rows(df, cube, by):
+    assert_same(rollup_count(cube, by), df.groupby(by, observed=True).size())
+    assert_same(rollup_nunique(cube, by, "restaurant_id"),
+                df.groupby(by, observed=True)["restaurant_id"].nunique())
+
+@pytest.mark.parametrize("by", ["country", ["city", "country"]])
+def test_distinct_dimension_counts_match_a_groupby_of_the_rows(df, cube, by):
+    assert_same(rollup_nunique(cube, by, "cuisines_"),
+                df.groupby(by, observed=True)["cuisines_"].nunique())
+
+@pytest.mark.parametrize("by", BYS)
+@pytest.mark.parametrize("metric", ["aggregate_rating", "votes", "average_cost_for_two", "price_range",
+                                    "average_cost_for_two_usd"])
+def test_means_match_a_groupby_of_the_rows(df, cube, by, metric):
+    expected = df.groupby(by, observed=True)[metric].mean()
+    # US dollar costs are summed in cents.
+    assert_same(rollup_mean(cube, by, metric), expected, atol=0.005, rtol=0)
+
+@pytest.mark.parametrize("above, value", [(True, 4.0), (False, 2.5), (True, 0.0)])
+def test_rating_counts_match_a_filtered_groupby(df, cube, above, value):
+    rows = df[df["aggregate_rating"] >= value] if above else df[df["aggregate_rating"] <= value]
+    expected = rows.groupby(["city", "country"], observed=True).size()
+    assert_same(rollup_rating_count(cube, ["city", "country"], above, value),
+                expected[expected > 0])
+
+def test_merged_cubes_of_disjoint_rows_equal_the_cube_of_all_rows(df):
+    parts = np.array_split(np.arange(len(df)), 4)
+    merged = merge_rollups([build_rollup(df.take(part)) for part in parts])
+    pd.testing.assert_frame_equal(merged, merge_rollups([build_rollup(df)]))
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.sketch import SPARSE_LIMIT, build_sketch, distinct_counts, merge_sketch
+
+# Three standard errors of a 2**12-register HyperLogLog (1.04 / sqrt(4096) ~ 1.6%).
+MAX_RELATIVE_ERROR = 0.05
+
+def frame(groups, values):
+    return pd.DataFrame({"group": np.asarray(groups).astype(str), "value": np.asarray(values).astype(str)})
+
+def test_small_groups_are_exact_without_registers():
+    sizes = {"a": 1, "b": 37, "c": SPARSE_LIMIT}
+    # Every value of every group appears three times.
+    df = pd.concat([frame([group] * 3 * size, np.tile(np.arange(size), 3)) for group, size in sizes.items()],
+                   ignore_index=True)
+
+    sketch = build_sketch(df, "value", ["group"])
+
+    assert sketch["exact"].all()
+    assert sketch["registers"].shape[0] == 0
+    assert distinct_counts(sketch, by="group").tolist() == [sizes[group] for group in sorted(sizes)]
+    assert distinct_counts(sketch) == df["value"].nunique()
+
+def test_large_groups_have_a_bounded_relative_error():
+    rng = np.random.default_rng(1)
+    values = rng.integers(0, 10 ** 12, 100_000)
+    df = frame(["small"] * 10 + ["large"] * len(values), np.concatenate([np.arange(10), values]))
+
+    sketch = build_sketch(df, "value", ["group"])
+    counts = distinct_counts(sketch, by="group")
+
+    assert sketch["exact"].tolist() == [False, True]
+    assert sketch["registers"].shape[0] == 1
+    assert counts["small"] == 10
+    assert abs(counts["large"] - len(np.unique(values))) / len(np.unique(values)) < MAX_RELATIVE_ERROR
+
+@pytest.mark.parametrize("size", [100, 100_000])
+def test_merge_equals_a_sketch_of_the_union(size):
+    rng = np.random.default_rng(2)
+    df = frame(rng.integers(0, 3, 2 * size), rng.integers(0, size, 2 * size))
+    first, second = df.iloc[:size], df.iloc[size:]
+
+    merged = merge_sketch(build_sketch(first, "value", ["group"]), build_sketch(second, "value", ["group"]))
+    union = build_sketch(df, "value", ["group"])
+
+    assert merged["exact"].tolist() == union["exact"].tolist()
+    np.testing.assert_array_equal(merged["registers"], union["registers"])
+    np.testing.assert_array_equal(merged["hashes"], union["hashes"])
+    assert distinct_counts(merged, by="group").tolist() == distinct_counts(union, by="group").tolist()
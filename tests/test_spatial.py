@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from utils.spatial import build_spatial_index, haversine_km, nearest, query_bbox, query_radius
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(0)
+    # Spread over the globe, plus crowds astride the antimeridian and around the north pole.
+    latitude = np.concatenate([np.degrees(np.arcsin(rng.uniform(-1, 1, 3000))), rng.uniform(-1, 1, 1000),
+                               rng.uniform(89, 90, 500)])
+    longitude = np.concatenate([rng.uniform(-180, 180, 3000), (rng.uniform(179, 181, 1000) + 180) % 360 - 180,
+                                rng.uniform(-180, 180, 500)])
+    return latitude, longitude
+
+@pytest.fixture(scope="module", params=[0.01, 1.0])
+def index(request, points):
+    return build_spatial_index(*points, cell_degrees=request.param)
+
+def even(positions):
+    return positions % 2 == 0
+
+@pytest.mark.parametrize("bounds", [
+    ((-10, -20), (10, 20)),
+    ((-0.5, 179.5), (0.5, -179.5)),  # across the antimeridian
+    ((88, -180), (90, 180)),
+    ((-90, -180), (90, 180)),
+    ((10, 10), (10.001, 10.001)),
+])
+@pytest.mark.parametrize("keep", [None, even])
+def test_query_bbox_matches_brute_force(points, index, bounds, keep):
+    latitude, longitude = points
+    (south, west), (north, east) = bounds
+    inside = (latitude >= south) & (latitude <= north)
+    inside &= ((longitude >= west) & (longitude <= east)) if west <= east else ((longitude >= west) | (longitude <= east))
+    expected = np.flatnonzero(inside)
+    if keep is not None:
+        expected = expected[keep(expected)]
+
+    np.testing.assert_array_equal(query_bbox(index, bounds, keep=keep), expected)
+
+def brute_force_radius(points, latitude, longitude, radius_km, keep=None):
+    distances = haversine_km(latitude, longitude, *points)
+    positions = np.flatnonzero(distances <= radius_km)
+    if keep is not None:
+        positions = positions[keep(positions)]
+    order = np.lexsort((positions, distances[positions]))
+    return positions[order], distances[positions][order]
+
+CENTERS = [
+    (0.0, 0.0, 500),
+    (0.0, 179.95, 80),  # the circle crosses the antimeridian
+    (0.3, -179.99, 30),
+    (89.95, 10.0, 50),  # the circle contains the north pole
+    (-89.0, 0.0, 300),  # the south pole
+    (45.0, 90.0, 3000),
+]
+
+@pytest.mark.parametrize("latitude, longitude, radius_km", CENTERS)
+@pytest.mark.parametrize("keep", [None, even])
+def test_query_radius_matches_brute_force(points, index, latitude, longitude, radius_km, keep):
+    positions, distances = query_radius(index, latitude, longitude, radius_km, keep=keep)
+    expected_positions, expected_distances = brute_force_radius(points, latitude, longitude, radius_km, keep)
+
+    np.testing.assert_array_equal(positions, expected_positions)
+    np.testing.assert_allclose(distances, expected_distances)
+
+@pytest.mark.parametrize("latitude, longitude, _", CENTERS)
+@pytest.mark.parametrize("k", [1, 10, 200])
+def test_nearest_matches_brute_force(points, index, latitude, longitude, _, k):
+    positions, distances = nearest(index, latitude, longitude, k, keep=even)
+    expected_positions, expected_distances = brute_force_radius(points, latitude, longitude, np.inf, even)
+
+    np.testing.assert_array_equal(positions, expected_positions[:k])
+    np.testing.assert_allclose(distances, expected_distances[:k])
+
+def test_nearest_returns_fewer_beyond_max_radius(points, index):
+    positions, distances = nearest(index, 0.0, 0.0, 10 ** 6, max_radius_km=1000)
+
+    expected_positions, _ = brute_force_radius(points, 0.0, 0.0, 1000)
+    np.testing.assert_array_equal(positions, expected_positions)
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from utils.stats import compute_moments, describe_numeric
+
+def test_rows_with_a_missing_group_key_are_ignored():
+    df = pd.DataFrame({
+        "country": ["Brazil", None, "India", "Brazil", np.nan, "India"],
+        "rating": [4.0, 1.0, 3.5, 2.0, 5.0, np.nan],
+        "votes": [10, 20, 30, 40, 50, 60],
+    })
+
+    moments = compute_moments(df, by="country")
+    statistics = describe_numeric(df, by="country").set_index(["country", "attributes"])
+    expected = df.dropna(subset=["country"]).groupby("country")[["rating", "votes"]]
+
+    assert moments.index.get_level_values("country").unique().tolist() == ["Brazil", "India"]
+    assert moments["count"].tolist() == [2, 2, 1, 2]
+    for (country, attribute), row in statistics.iterrows():
+        assert np.isclose(row["mean"], expected.mean().loc[country, attribute])
+        assert np.isclose(row["median"], expected.median().loc[country, attribute])
+        assert np.isclose(row["min"], expected.min().loc[country, attribute])
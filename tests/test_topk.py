@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.topk import top_k_per_group
+
+@pytest.mark.parametrize("by", ["group", ["group", "shard"]])
+@pytest.mark.parametrize("ascending", [False, True])
+@pytest.mark.parametrize("k", [0, 1, 3, 50])
+def test_top_k_per_group_matches_a_sorted_groupby_head(by, ascending, k):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"group": rng.choice(["a", "b", "c", None], 1000),
+                       "shard": rng.integers(0, 3, 1000),
+                       "value": rng.choice([1.0, 2.0, 3.0, np.nan], 1000)})
+
+    expected = df.sort_values("value", ascending=ascending, kind="stable", na_position="last")
+    expected = expected.groupby(by, sort=True).head(k)
+    expected = expected.iloc[np.argsort(expected.groupby(by, sort=True).ngroup().to_numpy(), kind="stable")]
+
+    assert top_k_per_group(df, k, by, "value", ascending=ascending).index.equals(expected.index)
+
+def test_top_k_per_group_of_an_empty_frame():
+    df = pd.DataFrame({"group": pd.Series([], dtype=object), "value": pd.Series([], dtype=float)})
+    assert top_k_per_group(df, 3, "group", "value").empty
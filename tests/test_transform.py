@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from utils.build import RAW_DATA_PATH
+from utils.helpers import (color_name, color_names, country_name, country_names, create_price_tye, first_cuisines,
+                           price_types, rename_columns)
+
+@pytest.fixture(scope="module")
+def raw():
+    return rename_columns(pd.read_csv(RAW_DATA_PATH)).dropna(subset=["cuisines"])
+
+def test_country_names_match_the_row_wise_helper(raw):
+    assert country_names(raw["country_code"]).tolist() == raw["country_code"].apply(country_name).tolist()
+
+def test_price_types_match_the_row_wise_helper(raw):
+    assert price_types(raw["price_range"]).tolist() == raw["price_range"].apply(create_price_tye).tolist()
+
+def test_color_names_match_the_row_wise_helper(raw):
+    assert color_names(raw["rating_color"]).tolist() == raw["rating_color"].apply(color_name).tolist()
+
+def test_first_cuisines_match_the_split(raw):
+    assert first_cuisines(raw["cuisines"]).tolist() == raw["cuisines"].apply(lambda x: x.split(",")[0]).tolist()
+
+def test_unknown_codes_raise_key_error():
+    with pytest.raises(KeyError):
+        country_name(999)
+    with pytest.raises(KeyError):
+        country_names(pd.Series([1, 999]))
+    with pytest.raises(KeyError):
+        color_name("000000")
+    with pytest.raises(KeyError):
+        color_names(pd.Series(["000000"]))
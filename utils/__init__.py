@@ -1,2 +1,6 @@
 from .helpers import process_data
-from .helpers import get_first_order_statistics
\ No newline at end of file
+from .helpers import load_data
+from .helpers import get_first_order_statistics
+from .loader import load_dataset
+from .loader import load_rollup
+from .loader import load_cuisines
@@ -0,0 +1,259 @@
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent builds are not serialized there.
+    fcntl = None
+
+from .helpers import CURRENT_PATH, VERSIONS_DIR, artifact_paths, current_version, update_processed_data
+
+RAW_DATA_PATH = "data/raw/zomato.csv"
+
+# Versions kept on disk, the published one included; sessions still reading the previous version
+# when a new one is published are not cut off mid-rerun.
+KEEP_VERSIONS = 2
+
+STAGING_PREFIX = ".staging-"
+
+# Status of the latest build, written by the build process and read by the dashboard.
+BUILD_STATUS_PATH = os.path.join(VERSIONS_DIR, ".status.json")
+
+# Background builds stream the raw export in chunks of this many rows: memory stays bounded and
+# progress is reported after every chunk.
+BACKGROUND_CHUNKSIZE = 100_000
+
+# Background builds run at a lower CPU priority than the server, so a refresh never slows down reruns.
+BACKGROUND_NICENESS = 10
+
+_job_lock = threading.Lock()
+
+# The build process started by this server, if any, so it can be reaped once it exits.
+_job = {"process": None}
+
+@contextlib.contextmanager
+def build_lock(versions_dir=VERSIONS_DIR):
+    """Serialize builds: two builds publishing at the same time would each drop the other's version."""
+
+    os.makedirs(versions_dir, exist_ok=True)
+    with open(os.path.join(versions_dir, ".lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+def new_version_name():
+    """Version names sort in build order: UTC timestamp to the microsecond plus a random suffix."""
+
+    now = time.time_ns()
+    seconds, micros = divmod(now // 1000, 1_000_000)
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(seconds))}.{micros:06d}Z-{uuid.uuid4().hex[:6]}"
+
+def _seed(source_dir, target_dir):
+    """Start a new version from the files of the published one, as hard links where possible."""
+
+    for name in os.listdir(source_dir):
+        source, target = os.path.join(source_dir, name), os.path.join(target_dir, name)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+def write_current(version, current_path=CURRENT_PATH):
+    tmp_path = current_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, current_path)
+
+def prune_versions(versions_dir=VERSIONS_DIR, keep=KEEP_VERSIONS, current=None):
+    """Remove all but the `keep` most recent versions (never `current`) and leftovers of failed builds."""
+
+    names = sorted(name for name in os.listdir(versions_dir) if not name.startswith("."))
+    stale = [name for name in names[:-keep] if name != current]
+    stale += [name for name in os.listdir(versions_dir) if name.startswith(STAGING_PREFIX)]
+    for name in stale:
+        shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+
+def publish(build, versions_dir=VERSIONS_DIR, current_path=CURRENT_PATH, keep=KEEP_VERSIONS):
+    """
+    Build a new version of the processed artifacts and publish it atomically.
+
+    The version is built in a staging directory seeded with hard links to the published files, so an
+    incremental build only processes what changed. Every ETL write goes through a temporary file and
+    a rename, which replaces the link rather than the shared file, so the published version is never
+    modified. The staging directory is then renamed into place and CURRENT switched to it with a
+    rename: readers see either the old or the new version, never a partial one.
+
+    Parameters:
+    - build (callable): Called with the artifact paths (see helpers.artifact_paths) to write to;
+      returns "unchanged", "appended" or "rebuilt".
+    - versions_dir (str): Directory holding the versions.
+    - current_path (str): Pointer file naming the published version.
+    - keep (int): Number of versions kept on disk.
+
+    Returns:
+    - tuple: The build status and the published version.
+    """
+
+    with build_lock(versions_dir):
+        current = current_version(current_path)
+        version = new_version_name()
+        staging = STAGING_PREFIX + version
+        os.makedirs(os.path.join(versions_dir, staging))
+
+        try:
+            if current is not None and os.path.isdir(os.path.join(versions_dir, current)):
+                _seed(os.path.join(versions_dir, current), os.path.join(versions_dir, staging))
+            status = build(artifact_paths(staging, versions_dir))
+        except BaseException:
+            shutil.rmtree(os.path.join(versions_dir, staging), ignore_errors=True)
+            raise
+
+        if status == "unchanged" and current is not None:
+            shutil.rmtree(os.path.join(versions_dir, staging), ignore_errors=True)
+            return status, current
+
+        os.rename(os.path.join(versions_dir, staging), os.path.join(versions_dir, version))
+        write_current(version, current_path)
+        prune_versions(versions_dir, keep=keep, current=version)
+        return status, version
+
+def build_processed_data(raw_path=RAW_DATA_PATH, chunksize=None, memory_limit_mb=None,
+                         versions_dir=VERSIONS_DIR, current_path=CURRENT_PATH, progress=None):
+    """
+    Bring the published dataset up to date with a raw export (see helpers.update_processed_data).
+
+    Returns:
+    - tuple: The build status and the published version.
+    """
+
+    def build(paths):
+        return update_processed_data(raw_path, output_path=paths["store"], manifest_path=paths["manifest"],
+                                     rollup_path=paths["rollup"], cuisines_path=paths["cuisines"],
+                                     sketches_path=paths["sketches"], chunksize=chunksize,
+                                     memory_limit_mb=memory_limit_mb, progress=progress)
+
+    return publish(build, versions_dir=versions_dir, current_path=current_path)
+
+def write_build_status(status, status_path=BUILD_STATUS_PATH):
+    os.makedirs(os.path.dirname(status_path) or ".", exist_ok=True)
+    tmp_path = f"{status_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(status, f)
+    os.replace(tmp_path, status_path)
+
+def _process_alive(pid):
+    process = _job["process"]
+    if process is not None and process.pid == pid:
+        return process.poll() is None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:  # Exists, but owned by another user.
+        return True
+    return True
+
+def build_status(status_path=BUILD_STATUS_PATH):
+    """
+    Status of the latest build, started from the dashboard or from the command line.
+
+    Returns:
+    - dict or None: None when no build has run yet. Otherwise `state` ("running", "succeeded",
+      "failed" or "interrupted" when the build process died without reporting), `pid`, `raw_path`,
+      `started`, the `chunks` and `rows` processed so far, `progress` (0 to 1), and once finished
+      `finished` plus the build `status` and published `version`, or the `error`.
+    """
+
+    try:
+        with open(status_path) as f:
+            status = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if status["state"] == "running" and not _process_alive(status["pid"]):
+        status["state"] = "interrupted"
+    return status
+
+def run_build(raw_path=RAW_DATA_PATH, chunksize=None, memory_limit_mb=None, status_path=BUILD_STATUS_PATH):
+    """build_processed_data, reporting its state and progress to `status_path` as it goes."""
+
+    status = {"state": "running", "pid": os.getpid(), "raw_path": raw_path, "started": time.time(),
+              "chunks": 0, "rows": 0, "progress": 0.0}
+    write_build_status(status, status_path)
+
+    def progress(chunks, rows, fraction):
+        status.update(chunks=chunks, rows=rows, progress=fraction)
+        write_build_status(status, status_path)
+
+    try:
+        result, version = build_processed_data(raw_path, chunksize=chunksize, memory_limit_mb=memory_limit_mb,
+                                               progress=progress)
+    except BaseException as error:
+        status.update(state="failed", finished=time.time(),
+                      error="".join(traceback.format_exception_only(type(error), error)).strip())
+        write_build_status(status, status_path)
+        raise
+
+    status.update(state="succeeded", finished=time.time(), progress=1.0, status=result, version=version)
+    write_build_status(status, status_path)
+    return result, version
+
+def start_build(raw_path=RAW_DATA_PATH, chunksize=BACKGROUND_CHUNKSIZE, memory_limit_mb=None,
+                status_path=BUILD_STATUS_PATH):
+    """
+    Start a build in a background process and return immediately.
+
+    The build runs in its own process, so parsing and transforming never compete with the server's
+    script threads for the GIL. Sessions keep serving the published version until the build swaps
+    CURRENT to the new one (see publish); follow it with build_status().
+
+    Returns:
+    - dict: The status of the started build, or of the one already running (only one runs at a time).
+    """
+
+    with _job_lock:
+        status = build_status(status_path)
+        if status is not None and status["state"] == "running":
+            return status
+        process = _job["process"]
+        if process is None or process.poll() is not None:
+            command = [sys.executable, "-m", "utils.build", raw_path, "--status-path", status_path,
+                       "--nice", str(BACKGROUND_NICENESS)]
+            if chunksize is not None:
+                command += ["--chunksize", str(chunksize)]
+            if memory_limit_mb is not None:
+                command += ["--memory-limit-mb", str(memory_limit_mb)]
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       start_new_session=True)
+            _job["process"] = process
+
+        # The process reports its own status once it has started.
+        return {"state": "running", "pid": process.pid, "raw_path": raw_path, "chunks": 0, "rows": 0,
+                "progress": 0.0}
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and publish the processed dataset the dashboard serves.")
+    parser.add_argument("raw_path", nargs="?", default=RAW_DATA_PATH, help="Raw Zomato CSV export")
+    parser.add_argument("--chunksize", type=int, default=None, help="Raw rows processed at a time")
+    parser.add_argument("--memory-limit-mb", type=float, default=None, help="Approximate peak memory budget")
+    parser.add_argument("--status-path", default=BUILD_STATUS_PATH, help="Where the build reports its progress")
+    parser.add_argument("--nice", type=int, default=0, help="Lower the CPU priority of the build by this much")
+    args = parser.parse_args()
+
+    if args.nice and hasattr(os, "nice"):
+        os.nice(args.nice)
+
+    status, version = run_build(args.raw_path, chunksize=args.chunksize, memory_limit_mb=args.memory_limit_mb,
+                                status_path=args.status_path)
+    print(status, version)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+def _csr(keys, values, n_keys):
+    """Group `values` by integer `keys` into CSR arrays: values of key k are values[offsets[k]:offsets[k + 1]]."""
+
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=offsets[1:])
+    return values[order], offsets
+
+def build_cuisine_table(cuisines):
+    """
+    Encode every cuisine each restaurant offers, not only the first one.
+
+    `cuisines` holds comma separated lists such as "Italian, Pizza, Fresh Fish". They are split,
+    stripped and integer-coded against a sorted vocabulary, then stored twice in CSR form:
+    - restaurant -> cuisines: codes[offsets[r]:offsets[r + 1]] are the cuisines of row r;
+    - cuisine -> restaurants: rows[cuisine_offsets[c]:cuisine_offsets[c + 1]] are the rows offering c.
+
+    Parameters:
+    - cuisines (pandas.Series): The `cuisines` column of the processed data, in store order.
+
+    Returns:
+    - dict: `categories`, `codes`, `offsets`, `rows` and `cuisine_offsets` arrays.
+    """
+
+    n_rows = len(cuisines)
+    exploded = cuisines.reset_index(drop=True).str.split(",").explode().str.strip()
+    exploded = exploded[exploded.notna() & (exploded != "")]
+    pairs = pd.DataFrame({"row": exploded.index.to_numpy(), "cuisine": exploded.to_numpy()}).drop_duplicates()
+
+    codes, categories = pd.factorize(pairs["cuisine"], sort=True)
+    code_dtype = np.int16 if len(categories) < 2 ** 15 else np.int32
+    row_dtype = np.int32 if n_rows < 2 ** 31 else np.int64
+    rows = pairs["row"].to_numpy().astype(row_dtype)
+    codes = codes.astype(code_dtype)
+
+    # Rows are already in ascending order after explode, so the restaurant -> cuisines side
+    # only needs its offsets.
+    offsets = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=offsets[1:])
+
+    cuisine_rows, cuisine_offsets = _csr(codes.astype(np.int64), rows, len(categories))
+
+    return {
+        "categories": np.asarray(categories, dtype=str),
+        "codes": codes,
+        "offsets": offsets,
+        "rows": cuisine_rows,
+        "cuisine_offsets": cuisine_offsets,
+    }
+
+def merge_cuisine_tables(tables):
+    """
+    Concatenate cuisine tables built from consecutive blocks of rows (e.g. the chunks of a streamed
+    file) into the table of all the rows, re-coding every block against the union vocabulary.
+    """
+
+    categories = np.unique(np.concatenate([table["categories"] for table in tables]))
+    vocabulary = pd.Index(categories)
+
+    codes, offsets, nnz = [], [np.zeros(1, dtype=np.int64)], 0
+    for table in tables:
+        codes.append(vocabulary.get_indexer(table["categories"])[table["codes"]])
+        offsets.append(table["offsets"][1:] + nnz)
+        nnz += len(table["codes"])
+    offsets = np.concatenate(offsets)
+    n_rows = len(offsets) - 1
+
+    code_dtype = np.int16 if len(categories) < 2 ** 15 else np.int32
+    row_dtype = np.int32 if n_rows < 2 ** 31 else np.int64
+    codes = np.concatenate(codes).astype(code_dtype)
+    rows = np.repeat(np.arange(n_rows, dtype=row_dtype), np.diff(offsets))
+    cuisine_rows, cuisine_offsets = _csr(codes.astype(np.int64), rows, len(categories))
+
+    return {
+        "categories": categories,
+        "codes": codes,
+        "offsets": offsets,
+        "rows": cuisine_rows,
+        "cuisine_offsets": cuisine_offsets,
+    }
+
+def save_cuisine_table(table, file_path):
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **table)
+    os.replace(tmp_path, file_path)
+
+def load_cuisine_table(file_path):
+    with np.load(file_path) as data:
+        return {name: data[name] for name in data.files}
+
+def cuisine_codes(table, cuisines):
+    codes = pd.Index(table["categories"]).get_indexer(list(cuisines))
+    return codes[codes >= 0]
+
+def restaurants_with_cuisines(table, cuisines):
+    """Sorted row positions of the restaurants offering any of `cuisines`."""
+
+    slices = [table["rows"][table["cuisine_offsets"][c]:table["cuisine_offsets"][c + 1]]
+              for c in cuisine_codes(table, cuisines)]
+    if not slices:
+        return np.empty(0, dtype=table["rows"].dtype)
+    return np.unique(np.concatenate(slices))
+
+def aggregate_by_cuisine(table, values, positions=None, cuisines=None, how="mean"):
+    """
+    Aggregate a per-restaurant measure over every cuisine the restaurants offer.
+
+    A restaurant offering three cuisines contributes to each of them.
+
+    Parameters:
+    - table (dict): The cuisine table from build_cuisine_table.
+    - values (array-like): One value per row of the processed data, in store order.
+    - positions (array-like, optional): Only these rows are aggregated.
+    - cuisines (list, optional): Only these cuisines are returned.
+    - how (str): "mean", "sum" or "count".
+
+    Returns:
+    - pandas.Series: The aggregate per cuisine, indexed by cuisine name, for cuisines with restaurants.
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    n_rows = len(table["offsets"]) - 1
+    n_cuisines = len(table["categories"])
+    counts = np.diff(table["offsets"])
+
+    if positions is None:
+        codes = table["codes"]
+        row_ids = np.repeat(np.arange(n_rows), counts)
+    else:
+        positions = np.asarray(positions)
+        starts = table["offsets"][positions]
+        lengths = counts[positions]
+        # Gather the CSR slices of the selected rows without a Python loop.
+        gather = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + \
+            np.arange(lengths.sum())
+        codes = table["codes"][gather]
+        row_ids = np.repeat(positions, lengths)
+
+    restaurants = np.bincount(codes, minlength=n_cuisines)
+    if how == "count":
+        result = restaurants.astype(np.float64)
+    else:
+        result = np.bincount(codes, weights=values[row_ids], minlength=n_cuisines)
+        if how == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result = result / restaurants
+
+    series = pd.Series(result, index=pd.Index(table["categories"], name="cuisines"))
+    series = series[restaurants > 0]
+    if cuisines is not None:
+        series = series[series.index.isin(cuisines)]
+    return series
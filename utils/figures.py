@@ -0,0 +1,62 @@
+import os
+
+import plotly.io as pio
+
+from .instrument import span
+from .loader import dataset_version
+from .lru import lru_clear, lru_get, lru_put, lru_stats, new_lru
+
+# Total size of the serialized figures kept in memory; a typical page chart is 10-100 KB.
+FIGURE_CACHE_MB = float(os.environ.get("FOME_ZERO_FIGURE_CACHE_MB", 64))
+
+# Shared by every session of the server process.
+_figures = new_lru(int(FIGURE_CACHE_MB * 2 ** 20))
+
+def normalize_selection(selection):
+    """
+    Hashable, order-insensitive form of a filter selection such as {"country": [...], "top_n": 10}.
+
+    Multiselect values are sorted, so picking the same countries in a different order hits the same entry.
+    """
+
+    def normalize(value):
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return tuple(sorted(value, key=str))
+        return value
+
+    return tuple(sorted((name, normalize(value)) for name, value in (selection or {}).items()))
+
+def cached_figure(page, chart, selection, build):
+    """
+    A figure from the shared figure cache, built on a miss.
+
+    Entries are keyed by (dataset version, page, chart, normalized selection) and hold the serialized
+    figure spec: a spec is immutable, so it is safe to share between sessions, and its length is the
+    memory it takes. Least recently used specs are evicted when the cache exceeds FIGURE_CACHE_MB, and
+    specs of older dataset versions simply age out.
+
+    Parameters:
+    - page (str): Page the chart belongs to.
+    - chart (str): Identifier of the chart on the page.
+    - selection (dict): Every filter value the figure depends on.
+    - build (callable): Returns the plotly Figure; only called on a miss.
+
+    Returns:
+    - plotly.graph_objs.Figure: A fresh figure the caller may modify.
+    """
+
+    key = (dataset_version(), page, chart, normalize_selection(selection))
+    spec = lru_get(_figures, key)
+    with span("cached_figure", page=page, chart=chart, hit=spec is not None):
+        if spec is None:
+            spec = pio.to_json(build(), validate=False)
+            lru_put(_figures, key, spec, len(spec))
+        return pio.from_json(spec)
+
+def figure_cache_stats():
+    """Hits, misses, evictions, hit rate, entries and bytes of the shared figure cache."""
+
+    return lru_stats(_figures)
+
+def clear_figure_cache():
+    lru_clear(_figures)
@@ -1,5 +1,73 @@
-import inflection
+import csv
+import functools
+import hashlib
+import json
+import os
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .cuisines import build_cuisine_table, load_cuisine_table, merge_cuisine_tables, save_cuisine_table
+from .instrument import instrumented
+from .rollup import build_rollup, merge_rollups
+from .sketch import build_sketches, load_sketches, merge_sketches, save_sketches
+from .stats import describe_numeric
+
+PROCESSED_DATA_PATH = "data/processed/data.parquet"
+ROLLUP_PATH = "data/processed/rollup.parquet"
+CUISINES_PATH = "data/processed/cuisines.npz"
+SKETCHES_PATH = "data/processed/sketches.npz"
+MANIFEST_PATH = "data/processed/manifest.json"
+
+# US dollars per unit of each country's currency. Versioned with the code; its hash is recorded in the
+# manifest, so editing it makes the next build recompute every normalized cost.
+CURRENCY_RATES_PATH = "data/currency_rates.csv"
+
+# Published builds: data/processed/versions/<version>/ holds one complete set of artifacts and
+# data/processed/CURRENT names the version being served.
+VERSIONS_DIR = "data/processed/versions"
+CURRENT_PATH = "data/processed/CURRENT"
+
+ARTIFACT_FILES = {
+    "store": "data.parquet",
+    "rollup": "rollup.parquet",
+    "cuisines": "cuisines.npz",
+    "sketches": "sketches.npz",
+    "manifest": "manifest.json",
+}
+
+# snake_case() of the columns of the raw export, precomputed so inflection is only imported for
+# columns the export does not have yet.
+RAW_COLUMN_NAMES = {
+    "Restaurant ID": "restaurant_id",
+    "Restaurant Name": "restaurant_name",
+    "Country Code": "country_code",
+    "City": "city",
+    "Address": "address",
+    "Locality": "locality",
+    "Locality Verbose": "locality_verbose",
+    "Longitude": "longitude",
+    "Latitude": "latitude",
+    "Cuisines": "cuisines",
+    "Average Cost for two": "average_cost_for_two",
+    "Currency": "currency",
+    "Has Table booking": "has_table_booking",
+    "Has Online delivery": "has_online_delivery",
+    "Is delivering now": "is_delivering_now",
+    "Switch to order menu": "switch_to_order_menu",
+    "Price range": "price_range",
+    "Aggregate rating": "aggregate_rating",
+    "Rating color": "rating_color",
+    "Rating text": "rating_text",
+    "Votes": "votes",
+}
+
+HASH_BLOCK_SIZE = 1 << 20
+
+# A streamed chunk is held about this many times over (raw, renamed, transformed, Arrow copies).
+CHUNK_MEMORY_FACTOR = 4
 
 COLORS = {
     "3F7E00": "darkgreen",
@@ -29,16 +97,27 @@ COUNTRIES = {
     216: "United States of America",
 }
 
+CATEGORICAL_COLUMNS = ["country", "city", "cuisines_", "price_type", "color_name", "currency"]
+
+INTEGER_DTYPES = {
+    "restaurant_id": "int64",
+    "country_code": "int16",
+    "average_cost_for_two": "int32",
+    "switch_to_order_menu": "int8",
+    "price_range": "int8",
+    "votes": "int32",
+}
+
+def snake_case(column):
+    """Titleize, drop the spaces and underscore a raw column name, e.g. "Restaurant ID" -> "restaurant_id"."""
+
+    import inflection
+
+    return inflection.underscore(inflection.titleize(column).replace(" ", ""))
+
 def rename_columns(dataframe):
     df = dataframe.copy()
-    title = lambda x: inflection.titleize(x)
-    snakecase = lambda x: inflection.underscore(x)
-    spaces = lambda x: x.replace(" ", "")
-    cols_old = list(df.columns)
-    cols_old = list(map(title, cols_old))
-    cols_old = list(map(spaces, cols_old))
-    cols_new = list(map(snakecase, cols_old))
-    df.columns = cols_new
+    df.columns = [RAW_COLUMN_NAMES.get(column) or snake_case(column) for column in df.columns]
     return df
 
 def country_name(country_id):
@@ -57,49 +136,583 @@ def create_price_tye(price_range):
 def color_name(color_code):
     return COLORS[color_code]
 
-def get_first_order_statistics(dataframe):
-    # Central Tendency Metrics
-    mean = pd.DataFrame(dataframe.apply(np.mean)).T
-    median = pd.DataFrame(dataframe.apply(np.median)).T
-
-    # Dispersion Metrics
-    min_ = pd.DataFrame(dataframe.apply(min)).T
-    max_ = pd.DataFrame(dataframe.apply(max)).T
-    range_ = pd.DataFrame(dataframe.apply(lambda x: x.max() - x.min())).T
-    std = pd.DataFrame(dataframe.apply(np.std)).T
-    skew = pd.DataFrame(dataframe.apply(lambda x: x.skew())).T
-    kurtosis = pd.DataFrame(dataframe.apply(lambda x: x.kurtosis())).T
-
-    # Metrics Concatenation
-    m = pd.concat([min_, max_, range_, mean, median, std, skew, kurtosis]).T.reset_index()
-    m.columns = ['attributes', 'min', 'max', 'range', 'mean', 'median', 'std', 'skew', 'kurtosis']
-    
-    return m
+def map_categories(series, mapping):
+    """
+    Vectorized dictionary lookup; raises KeyError for values missing from `mapping`, like the
+    row-wise helpers do.
+    """
+
+    mapped = series.map(mapping)
+    missing = mapped.isna() & series.notna()
+    if missing.any():
+        raise KeyError(series[missing].unique().tolist())
+    return mapped
+
+def country_names(country_codes):
+    return map_categories(country_codes, COUNTRIES)
+
+def price_types(price_ranges):
+    choices = np.select(
+        [price_ranges == 1, price_ranges == 2, price_ranges == 3],
+        ["cheap", "normal", "expensive"],
+        default="gourmet",
+    )
+    return pd.Series(choices, index=price_ranges.index, name=price_ranges.name, dtype=object)
+
+def color_names(color_codes):
+    return map_categories(color_codes, COLORS)
+
+def first_cuisines(cuisines):
+    return cuisines.str.split(",", n=1).str[0]
+
+def load_currency_rates(file_path=CURRENCY_RATES_PATH):
+    """
+    The currency conversion table, indexed by country_code, with the ISO `currency_code` and `usd_per_unit`.
+
+    It is keyed by country rather than by the raw `currency` label, which is ambiguous ("Dollar($)" is
+    used for four currencies) or wrong ("Botswana Pula(P)" for the Philippines).
+    """
+
+    return pd.read_csv(file_path, comment="#").set_index("country_code")
+
+def usd_costs(costs, country_codes, rates):
+    """Costs in local currency converted to US dollars, rounded to the cent, joined on the country code."""
+
+    return (costs * map_categories(country_codes, rates["usd_per_unit"])).round(2)
+
+# Columns that are a function of another column: column -> (source column, vectorized mapping).
+# The serving side recomputes them from the source instead of holding both in memory.
+DERIVED_COLUMNS = {
+    "country": ("country_code", country_names),
+    "price_type": ("price_range", price_types),
+    "color_name": ("rating_color", color_names),
+}
+
+def get_first_order_statistics(dataframe, by=None):
+    """
+    Descriptive statistics of the numeric columns (see utils.stats.describe_numeric).
+
+    Parameters:
+    - dataframe (pandas.DataFrame): The data.
+    - by (str or list, optional): Grouping column(s), e.g. 'country', for per-group statistics.
+
+    Returns:
+    - pandas.DataFrame: Columns 'attributes', 'min', 'max', 'range', 'mean', 'median', 'std', 'skew' and
+      'kurtosis', preceded by the group keys when `by` is given.
+    """
+
+    return describe_numeric(dataframe, by=by)
+
+def file_fingerprint(file_path, prefix_size=None):
+    """
+    Fingerprint a file by size, modification time and SHA-256 of its content.
+
+    Parameters:
+    - file_path (str): The file to fingerprint.
+    - prefix_size (int, optional): Also return the hash of the first `prefix_size` bytes,
+      computed in the same read, so appends to a known file can be detected.
+
+    Returns:
+    - dict: `size`, `mtime_ns`, `sha256` and, when requested, `prefix_sha256`.
+    """
+
+    stat = os.stat(file_path)
+    digest = hashlib.sha256()
+    prefix_digest = None
+    read = 0
+
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            if prefix_size is not None and read < prefix_size <= read + len(block):
+                digest.update(block[:prefix_size - read])
+                prefix_digest = digest.copy().hexdigest()
+                digest.update(block[prefix_size - read:])
+            else:
+                digest.update(block)
+            read += len(block)
+
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+    if prefix_size is not None:
+        fingerprint["prefix_sha256"] = prefix_digest
+    return fingerprint
+
+def read_manifest(manifest_path=MANIFEST_PATH):
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def write_manifest(manifest, manifest_path=MANIFEST_PATH):
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+def current_version(current_path=CURRENT_PATH):
+    """Name of the published version, or None when nothing has been published yet."""
+
+    try:
+        with open(current_path) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
 
-def process_data(file_path):
-    df = pd.read_csv(file_path)
+def artifact_paths(version=None, versions_dir=VERSIONS_DIR):
+    """
+    Paths of the artifacts of a published version, by ARTIFACT_FILES name.
+
+    Without a version, the unversioned paths (PROCESSED_DATA_PATH, ROLLUP_PATH...) are returned.
+    """
+
+    if version is None:
+        return {"store": PROCESSED_DATA_PATH, "rollup": ROLLUP_PATH, "cuisines": CUISINES_PATH,
+                "sketches": SKETCHES_PATH, "manifest": MANIFEST_PATH}
+    return {name: os.path.join(versions_dir, version, file_name) for name, file_name in ARTIFACT_FILES.items()}
+
+def transform_data(df, seen_ids=(), rates=None):
+    """
+    Clean and enrich a raw Zomato frame.
+
+    Parameters:
+    - df (pandas.DataFrame): Raw rows with the original column names.
+    - seen_ids (numpy.ndarray, optional): Sorted restaurant IDs already handled by a previous run or
+      chunk; rows with these IDs are discarded so the first occurrence keeps winning across runs.
+    - rates (pandas.DataFrame, optional): The currency conversion table (see load_currency_rates);
+      read from CURRENCY_RATES_PATH by default.
+
+    Returns:
+    - tuple: The processed DataFrame and the IDs dropped for missing values.
+    """
 
     df = rename_columns(df)
 
     df = df.drop_duplicates(subset=['restaurant_id'])
+    if len(seen_ids):
+        df = df[~contains_sorted(seen_ids, df['restaurant_id'].to_numpy())]
 
-    df = df.dropna()
+    complete = df.notna().all(axis=1)
+    rejected_ids = df.loc[~complete, 'restaurant_id'].tolist()
+    df = df[complete].copy()
 
     # Change data types
     df['has_table_booking'] = df['has_table_booking'].astype(bool)
     df['has_online_delivery'] = df['has_online_delivery'].astype(bool)
     df['is_delivering_now'] = df['is_delivering_now'].astype(bool)
 
-    df['country'] = df['country_code'].apply(country_name)
-    df['price_type'] = df['price_range'].apply(create_price_tye)
-    df['color_name'] = df['rating_color'].apply(color_name)
+    for column, (source, derive) in DERIVED_COLUMNS.items():
+        df[column] = derive(df[source])
+
+    df["cuisines_"] = first_cuisines(df["cuisines"])
+
+    rates = load_currency_rates() if rates is None else rates
+    df["average_cost_for_two_usd"] = usd_costs(df["average_cost_for_two"], df["country_code"], rates)
+
+    return df, rejected_ids
+
+def contains_sorted(sorted_values, values):
+    """Vectorized membership test of `values` in the sorted array `sorted_values`."""
+
+    positions = np.searchsorted(sorted_values, values)
+    found = positions < len(sorted_values)
+    found[found] = sorted_values[positions[found]] == values[found]
+    return found
+
+def optimize_dtypes(df):
+    """Store low-cardinality text as categoricals and integers in fixed compact dtypes."""
+
+    df = df.copy()
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype("category")
+    # astype wraps out-of-range integers silently. Every chunk must share one store schema, so a
+    # value that does not fit is an error, not a reason to widen the column.
+    for column, dtype in INTEGER_DTYPES.items():
+        values = df[column]
+        limits = np.iinfo(dtype)
+        if len(values) and (values.min() < limits.min or values.max() > limits.max):
+            raise ValueError(f"{column} has values outside the {dtype} range [{limits.min}, {limits.max}]: "
+                             f"{values.min()} to {values.max()}")
+    return df.astype(INTEGER_DTYPES)
+
+def remove_unused_categories(df):
+    """Drop categories a filtered or aggregated frame no longer contains, so plots only see observed values."""
+
+    df = df.copy()
+    for column in df.select_dtypes("category"):
+        df[column] = df[column].cat.remove_unused_categories()
+    return df
+
+def write_parquet(df, file_path):
+    """Write to a temporary file and rename it into place so readers never see a partial store."""
+
+    tmp_path = file_path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, file_path)
+
+@instrumented
+def load_data(columns=None, file_path=PROCESSED_DATA_PATH):
+    """
+    Read the processed store.
 
-    df["cuisines_"] = df.loc[:, "cuisines"].apply(lambda x: x.split(",")[0])
+    Parameters:
+    - columns (list, optional): Only these columns are read from disk.
+    - file_path (str): Path of the processed store.
 
-    df.to_csv("data/processed/data.csv", index=False)
+    Returns:
+    - pandas.DataFrame: The processed data with its stored dtypes.
+    """
 
+    df = pd.read_parquet(file_path, columns=columns)
+
+    # A store written in chunks has one dictionary per chunk, which unify in order of appearance;
+    # keep categories sorted so groupby output order does not depend on how the store was written.
+    for column in df.select_dtypes("category"):
+        if not df[column].cat.categories.is_monotonic_increasing:
+            df[column] = df[column].cat.reorder_categories(df[column].cat.categories.sort_values())
     return df
 
+def read_raw_data(file_path, offset=0, chunksize=None, on_chunk=None):
+    """
+    Read a raw CSV, optionally only the rows appended after byte `offset`.
+
+    Parameters:
+    - file_path (str): Path to the raw CSV.
+    - offset (int): Byte offset of the first row to read; 0 reads the whole file. Must be a row boundary.
+    - chunksize (int, optional): Yield frames of at most this many rows instead of one frame.
+    - on_chunk (callable, optional): Called with the number of rows of a frame and the byte position
+      reached in the file once the consumer asks for the next frame, i.e. once it is done with it.
+
+    Returns:
+    - generator: The raw frames.
+    """
+
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        if offset:
+            f.seek(offset)
+        else:
+            f.seek(0)
+            header = None
+        names = next(csv.reader([header.decode("utf-8")])) if header else None
+        reader = pd.read_csv(f, header=None if names else "infer", names=names, chunksize=chunksize)
+        for frame in [reader] if chunksize is None else reader:
+            rows = len(frame)
+            # Hand the chunk over without keeping a reference to it while the consumer transforms it.
+            chunk, frame = [frame], None
+            yield chunk.pop()
+            if on_chunk is not None:
+                on_chunk(rows, f.tell())
+
+def estimate_chunksize(file_path, memory_limit_mb, sample_rows=1000):
+    """
+    Number of raw rows per chunk that keeps peak memory of a streamed run around `memory_limit_mb`.
+
+    The in-memory size of a row is measured on a sample; a chunk is held several times over while it
+    is transformed and written, hence the safety factor.
+    """
+
+    sample = pd.read_csv(file_path, nrows=sample_rows)
+    bytes_per_row = sample.memory_usage(deep=True).sum() / max(len(sample), 1)
+    return max(int(memory_limit_mb * 2 ** 20 / (CHUNK_MEMORY_FACTOR * bytes_per_row)), 1)
+
+def _arrow_table(df, schema=None):
+    table = pa.Table.from_pandas(optimize_dtypes(df), preserve_index=False)
+    if schema is None:
+        # Chunks have different category counts, hence different dictionary index widths:
+        # pin them so every chunk matches the schema of the first one.
+        fields = [pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type))
+                  if pa.types.is_dictionary(f.type) else f for f in table.schema]
+        schema = pa.schema(fields, metadata=table.schema.metadata)
+    return table.cast(schema)
+
+def push_merged(stack, part, merge):
+    """
+    Push `part` on a stack of partial results, merging it with the top while both cover the same number
+    of parts, like carries in a binary counter.
+
+    n parts are thereby merged in a balanced tree: every part takes part in O(log n) merges and the
+    stack never holds more than log2(n) + 1 partial results, instead of re-merging one ever-growing
+    result with every new part.
+
+    Parameters:
+    - stack (list): (number of parts, partial result) pairs, oldest first; updated in place.
+    - part: The new partial result.
+    - merge (callable): Merges a list of partial results, oldest first, into one.
+    """
+
+    count = 1
+    while stack and stack[-1][0] == count:
+        previous_count, previous = stack.pop()
+        part, count = merge([previous, part]), previous_count + count
+    stack.append((count, part))
+
+def _merge_sorted(arrays):
+    # Timsort merges the concatenated sorted runs in linear time.
+    return np.sort(np.concatenate(arrays), kind="stable")
+
+def _contains_any(runs, values):
+    found = np.zeros(len(values), dtype=bool)
+    for _, run in runs:
+        found |= contains_sorted(run, values)
+    return found
+
+def _expand_prebuilt(parts, seen_ids):
+    """
+    `parts`, with the prebuilt parts that repeat IDs of earlier parts turned into (DataFrame, rejected
+    IDs) parts of their stored rows, which write_store then deduplicates like freshly transformed ones.
+    """
+
+    for part in parts:
+        if not isinstance(part, dict) or not _contains_any(seen_ids, part["ids"]).any():
+            yield part
+            continue
+        rejected = part["rejected_ids"]
+        for batch in pq.ParquetFile(part["store"]).iter_batches():
+            df = batch.to_pandas()
+            # Back to the dtypes of transform_data, so the categories of the dropped rows do not linger.
+            yield df.astype({column: object for column in df.select_dtypes("category")}), rejected
+            rejected = []
+        if len(rejected):
+            yield pd.read_parquet(part["store"]), rejected
+
+@instrumented
+def write_store(parts, output_path, rollup_path, cuisines_path, seen_ids=(), previous=None,
+                sketches_path=SKETCHES_PATH):
+    """
+    Write transformed parts to the processed store, rollup cube, cuisine table and distinct-count
+    sketches.
+
+    Parts are handled one at a time: each is deduplicated against the IDs of the previous parts and
+    appended to the store as a Parquet row group. Those IDs, and the rollup cubes and sketches of the
+    parts, are merged in a balanced tree (see push_merged), so the total merge work grows with
+    n log n rather than with n times the store size; the cuisine tables are concatenated once at the
+    end. Peak memory is therefore bounded by the part size rather than by the size of the raw data.
+
+    A part can also be prebuilt: the artifact paths and IDs of an earlier write_store on a subset of
+    the rows (see utils.ingest). When none of its IDs was seen before, its Arrow batches are copied as
+    they are and its rollup cube, cuisine table and sketches merged without being rebuilt; otherwise
+    its stored rows are deduplicated and their artifacts rebuilt like those of any other part.
+
+    Parameters:
+    - parts (iterable): `transform_data` results, (DataFrame, rejected IDs), or prebuilt parts (dict
+      of `store`, `rollup`, `cuisines` and `sketches` paths, `ids` and `rejected_ids`), in raw data order.
+    - output_path (str): Path of the processed store.
+    - rollup_path (str): Path of the rollup cube.
+    - cuisines_path (str): Path of the cuisine table.
+    - seen_ids (array-like): Restaurant IDs that must not be added again.
+    - previous (dict, optional): Existing `store`, `rollup`, `cuisines` and `sketches` paths to extend.
+    - sketches_path (str): Path of the distinct-count sketches (see utils.sketch).
+
+    Returns:
+    - list: The IDs dropped for missing values.
+    """
+
+    # Sorted runs of the IDs handled so far, and partial rollup cubes and sketches, merged as they pile up.
+    seen_ids = [(1, np.unique(np.asarray(seen_ids, dtype=np.int64)))]
+    rejected_ids = []
+    rollups = []
+    cuisines = []
+    sketches = []
+    writer = None
+    df = None
+    tmp_path = output_path + ".tmp"
+
+    if previous is not None:
+        rollups.append((1, load_data(file_path=previous["rollup"])))
+        cuisines.append(load_cuisine_table(previous["cuisines"]))
+        sketches.append((1, load_sketches(previous["sketches"])))
+        for batch in pq.ParquetFile(previous["store"]).iter_batches():
+            table = _arrow_table(batch.to_pandas(), writer.schema if writer else None)
+            writer = writer or pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table)
+
+    try:
+        for part in _expand_prebuilt(parts, seen_ids):
+            if isinstance(part, dict):
+                rejected_ids += list(part["rejected_ids"])
+                push_merged(seen_ids, part["ids"], _merge_sorted)
+                store = pq.ParquetFile(part["store"])
+                if store.metadata.num_rows == 0:
+                    df = pd.read_parquet(part["store"]) if df is None else df
+                    continue
+                for batch in store.iter_batches():
+                    table = pa.Table.from_batches([batch])
+                    table = table.cast(writer.schema) if writer else table
+                    writer = writer or pq.ParquetWriter(tmp_path, table.schema)
+                    writer.write_table(table)
+                push_merged(rollups, load_data(file_path=part["rollup"]), merge_rollups)
+                cuisines.append(load_cuisine_table(part["cuisines"]))
+                push_merged(sketches, load_sketches(part["sketches"]), merge_sketches)
+                continue
+            df, rejected = part
+            ids = df['restaurant_id'].to_numpy(dtype=np.int64)
+            rejected = np.asarray(rejected, dtype=np.int64)
+            df = df[~_contains_any(seen_ids, ids)]
+            rejected = rejected[~_contains_any(seen_ids, rejected)]
+            rejected_ids += rejected.tolist()
+            push_merged(seen_ids, np.unique(np.concatenate([ids, rejected])), _merge_sorted)
+            if df.empty:
+                continue
+            table = _arrow_table(df, writer.schema if writer else None)
+            writer = writer or pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table)
+            push_merged(rollups, build_rollup(df), merge_rollups)
+            cuisines.append(build_cuisine_table(df["cuisines"]))
+            push_merged(sketches, build_sketches(df), merge_sketches)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        if df is None:
+            raise ValueError("The raw data has no rows")
+        # Nothing survived cleaning: write an empty store with the usual columns.
+        write_parquet(optimize_dtypes(df), output_path)
+        rollup = build_rollup(df)
+        cuisines = [build_cuisine_table(df["cuisines"])]
+        sketches = build_sketches(df)
+    else:
+        os.replace(tmp_path, output_path)
+        rollup = merge_rollups([part for _, part in rollups])
+        sketches = merge_sketches([part for _, part in sketches])
+
+    write_parquet(rollup, rollup_path)
+    save_cuisine_table(merge_cuisine_tables(cuisines), cuisines_path)
+    save_sketches(sketches, sketches_path)
+
+    return rejected_ids
+
+@instrumented
+def update_processed_data(file_path, output_path=PROCESSED_DATA_PATH, manifest_path=MANIFEST_PATH,
+                          rollup_path=ROLLUP_PATH, cuisines_path=CUISINES_PATH, chunksize=None,
+                          memory_limit_mb=None, sketches_path=SKETCHES_PATH, progress=None,
+                          rates_path=CURRENCY_RATES_PATH):
+    """
+    Bring the processed dataset up to date with the raw file, doing as little work as possible.
+
+    The raw file is fingerprinted and compared with the manifest of the previous run:
+    - unchanged size and mtime (or unchanged content): nothing is done;
+    - the old content is a prefix of the new one: only the appended rows are processed and
+      merged into the processed store, deduplicated by `restaurant_id`;
+    - anything else, or a changed currency conversion table: the processed store is rebuilt from scratch.
+
+    By default the raw rows are parsed in one go. Set `chunksize` (rows) or `memory_limit_mb` to stream
+    them in chunks instead, for raw exports that do not fit comfortably in memory.
+
+    Parameters:
+    - file_path (str): Path to the raw CSV.
+    - output_path (str): Path of the processed store.
+    - manifest_path (str): Path of the manifest describing the last run.
+    - rollup_path (str): Path of the pre-aggregated rollup cube (see utils.rollup).
+    - cuisines_path (str): Path of the restaurant <-> cuisine table (see utils.cuisines).
+    - chunksize (int, optional): Number of raw rows processed at a time.
+    - memory_limit_mb (float, optional): Approximate peak memory budget; used to derive `chunksize`.
+    - sketches_path (str): Path of the distinct-count sketches (see utils.sketch).
+    - progress (callable, optional): Called after every processed chunk with the number of chunks and
+      raw rows processed so far and the fraction of the raw bytes to process that is done.
+    - rates_path (str): Path of the currency conversion table (see load_currency_rates).
+
+    Returns:
+    - str: "unchanged", "appended" or "rebuilt".
+    """
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    if chunksize is None and memory_limit_mb is not None:
+        chunksize = estimate_chunksize(file_path, memory_limit_mb)
+
+    rates = load_currency_rates(rates_path)
+    rates_sha256 = file_fingerprint(rates_path)["sha256"]
+
+    manifest = read_manifest(manifest_path)
+    if manifest is not None and (manifest.get("raw_path") != file_path
+                                 or manifest.get("currency_rates_sha256") != rates_sha256
+                                 or not os.path.exists(output_path)
+                                 or not os.path.exists(rollup_path)
+                                 or not os.path.exists(cuisines_path)
+                                 or not os.path.exists(sketches_path)):
+        manifest = None
+
+    if manifest is not None:
+        stat = os.stat(file_path)
+        if stat.st_size == manifest["size"] and stat.st_mtime_ns == manifest["mtime_ns"]:
+            return "unchanged"
+
+    fingerprint = file_fingerprint(file_path, prefix_size=manifest["size"] if manifest else None)
+
+    def read(offset=0):
+        if progress is None:
+            return read_raw_data(file_path, offset=offset, chunksize=chunksize)
+        done = {"chunks": 0, "rows": 0}
+
+        def on_chunk(rows, position):
+            done["chunks"] += 1
+            done["rows"] += rows
+            progress(done["chunks"], done["rows"],
+                     min((position - offset) / max(fingerprint["size"] - offset, 1), 1.0))
+
+        return read_raw_data(file_path, offset=offset, chunksize=chunksize, on_chunk=on_chunk)
+
+    transform = functools.partial(transform_data, rates=rates)
+
+    if manifest is not None and fingerprint["sha256"] == manifest["sha256"]:
+        status = "unchanged"
+        rejected_ids = manifest["rejected_ids"]
+    elif (manifest is not None
+          and fingerprint.get("prefix_sha256") == manifest["sha256"]
+          and manifest.get("ends_with_newline")):
+        previous_ids = load_data(columns=['restaurant_id'], file_path=output_path)['restaurant_id']
+        rejected_ids = manifest["rejected_ids"] + write_store(
+            map(transform, read(offset=manifest["size"])),
+            output_path, rollup_path, cuisines_path,
+            seen_ids=np.concatenate([previous_ids.to_numpy(dtype=np.int64),
+                                     np.asarray(manifest["rejected_ids"], dtype=np.int64)]),
+            previous={"store": output_path, "rollup": rollup_path, "cuisines": cuisines_path,
+                      "sketches": sketches_path},
+            sketches_path=sketches_path,
+        )
+        status = "appended"
+    else:
+        rejected_ids = write_store(map(transform, read()),
+                                   output_path, rollup_path, cuisines_path, sketches_path=sketches_path)
+        status = "rebuilt"
+
+    with open(file_path, "rb") as f:
+        f.seek(max(fingerprint["size"] - 1, 0))
+        ends_with_newline = f.read(1) == b"\n"
+
+    fingerprint.pop("prefix_sha256", None)
+    write_manifest(dict(fingerprint,
+                        raw_path=file_path,
+                        currency_rates_sha256=rates_sha256,
+                        ends_with_newline=ends_with_newline,
+                        rejected_ids=[int(i) for i in rejected_ids]),
+                   manifest_path)
+
+    return status
+
+@instrumented
+def process_data(file_path, output_path=PROCESSED_DATA_PATH, chunksize=None, memory_limit_mb=None):
+    """
+    Bring the processed dataset up to date (see update_processed_data) and load it.
+
+    The manifest, rollup, cuisine table and sketches are written next to `output_path`, under their
+    ARTIFACT_FILES names, so a custom output path never touches the default artifacts.
+    """
+
+    directory = os.path.dirname(output_path)
+    paths = {name: os.path.join(directory, file_name) for name, file_name in ARTIFACT_FILES.items()}
+    update_processed_data(file_path, output_path, manifest_path=paths["manifest"], rollup_path=paths["rollup"],
+                          cuisines_path=paths["cuisines"], sketches_path=paths["sketches"],
+                          chunksize=chunksize, memory_limit_mb=memory_limit_mb)
+
+    return load_data(file_path=output_path)
+
+# Measures the price charts can show, with their display names.
+PRICE_MEASURES = {"price_range": "Price Range", "average_cost_for_two_usd": "Cost for Two (USD)"}
+
 def convert_string_label(input_string):
     # Substituir underscores por espaços
     output_string = input_string.replace('_', ' ')
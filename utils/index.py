@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ["country", "cuisines_"]
+
+def build_filter_index(df, columns=FILTER_COLUMNS):
+    """
+    Build an inverted index from each category of `columns` to the positions of its rows.
+
+    For every column the row positions are stored grouped by category (ascending within a category)
+    with CSR-style offsets, so the rows of a category are a slice: positions[offsets[c]:offsets[c + 1]].
+
+    Parameters:
+    - df (pandas.DataFrame): The frame to index.
+    - columns (list): Columns to index.
+
+    Returns:
+    - dict: `n_rows` plus, per column, its `categories`, `positions` and `offsets`.
+    """
+
+    index = {"n_rows": len(df)}
+    for column in columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            codes = df[column].cat.codes.to_numpy()
+            categories = df[column].cat.categories
+        else:
+            codes, categories = pd.factorize(df[column])
+        positions = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        offsets = np.zeros(len(categories) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        # Missing values (code -1) sort first; skip them so category c starts at offsets[c].
+        positions = positions[len(codes) - offsets[-1]:]
+        index[column] = {
+            "categories": pd.Index(categories),
+            "positions": positions.astype(np.int32 if len(df) < 2 ** 31 else np.int64),
+            "offsets": offsets,
+        }
+    return index
+
+def category_positions(index, column, values):
+    """Sorted positions of the rows whose `column` is any of `values`."""
+
+    entry = index[column]
+    codes = entry["categories"].get_indexer(list(values))
+    slices = [entry["positions"][entry["offsets"][c]:entry["offsets"][c + 1]] for c in codes if c >= 0]
+    if not slices:
+        return np.empty(0, dtype=entry["positions"].dtype)
+    return np.sort(np.concatenate(slices))
+
+def select_rows(index, **selections):
+    """
+    Intersect multiselect filters using the index, e.g. select_rows(index, country=[...], cuisines_=[...]).
+
+    A selection of None leaves that column unfiltered. The cost depends on the number of selected rows,
+    not on the size of the frame.
+
+    Returns:
+    - numpy.ndarray: Sorted positions of the matching rows, suitable for DataFrame.take.
+    """
+
+    result = None
+    for column, values in selections.items():
+        if values is None:
+            continue
+        positions = category_positions(index, column, values)
+        result = positions if result is None else np.intersect1d(result, positions, assume_unique=True)
+    if result is None:
+        return np.arange(index["n_rows"])
+    return result
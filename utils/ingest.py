@@ -0,0 +1,162 @@
+import argparse
+import collections
+import functools
+import glob
+import itertools
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from .build import publish
+from .helpers import (
+    ARTIFACT_FILES,
+    CURRENCY_RATES_PATH,
+    CUISINES_PATH,
+    MANIFEST_PATH,
+    PROCESSED_DATA_PATH,
+    ROLLUP_PATH,
+    SKETCHES_PATH,
+    estimate_chunksize,
+    file_fingerprint,
+    load_currency_rates,
+    read_manifest,
+    read_raw_data,
+    transform_data,
+    write_manifest,
+    write_store,
+)
+
+def resolve_sources(source):
+    """Raw CSV files for a directory (all *.csv inside it) or a glob pattern, in sorted order."""
+
+    pattern = os.path.join(source, "*.csv") if os.path.isdir(source) else source
+    return sorted(glob.glob(pattern))
+
+def sources_fingerprint(files):
+    fingerprint = []
+    for path in files:
+        stat = os.stat(path)
+        fingerprint.append({"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+    return fingerprint
+
+def transform_file(path, directory, chunksize=None):
+    """
+    Transform one raw file into a store, rollup cube, cuisine table and sketches of its own, written in
+    a new subdirectory of `directory`; runs in a worker process.
+
+    The file is streamed in chunks of `chunksize` rows when given, like update_processed_data.
+
+    Returns:
+    - dict: A prebuilt part for write_store: the artifact paths, the sorted restaurant IDs of the file
+      (rejected ones included) and the rejected IDs.
+    """
+
+    directory = tempfile.mkdtemp(dir=directory)
+    paths = {name: os.path.join(directory, file_name) for name, file_name in ARTIFACT_FILES.items()}
+    transform = functools.partial(transform_data, rates=load_currency_rates(CURRENCY_RATES_PATH))
+    rejected_ids = write_store(map(transform, read_raw_data(path, chunksize=chunksize)),
+                               paths["store"], paths["rollup"], paths["cuisines"], sketches_path=paths["sketches"])
+    ids = pq.read_table(paths["store"], columns=["restaurant_id"])["restaurant_id"].to_numpy()
+    return dict(paths, ids=np.unique(np.concatenate([ids, np.asarray(rejected_ids, dtype=np.int64)])),
+                rejected_ids=rejected_ids)
+
+def removed_after_use(parts):
+    """Prebuilt parts, each of whose temporary directory is removed once the consumer is done with it."""
+
+    for part in parts:
+        yield part
+        shutil.rmtree(os.path.dirname(part["store"]))
+
+def ordered_results(executor, fn, items, window):
+    """
+    Like executor.map, but with at most `window` tasks submitted ahead of the result being consumed,
+    so results that the consumer has not reached yet cannot pile up in memory.
+    """
+
+    items = iter(items)
+    pending = collections.deque(executor.submit(fn, item) for item in itertools.islice(items, window))
+    while pending:
+        pending.extend(executor.submit(fn, item) for item in itertools.islice(items, 1))
+        # The future is dropped before yielding, so only the consumer holds its result.
+        yield pending.popleft().result()
+
+def ingest_raw_files(source, workers=None, output_path=PROCESSED_DATA_PATH, manifest_path=MANIFEST_PATH,
+                     rollup_path=ROLLUP_PATH, cuisines_path=CUISINES_PATH, sketches_path=SKETCHES_PATH,
+                     chunksize=None, memory_limit_mb=None):
+    """
+    Build the processed store from several raw files, e.g. one drop per country.
+
+    A process pool transforms the files in parallel, each into a store, rollup cube, cuisine table and
+    sketches of its own (see transform_file); the parent only merges them in sorted file order with a
+    global `restaurant_id` dedup, so the first occurrence across all files wins exactly as if the files
+    had been concatenated; only a file that repeats restaurants of an earlier one has its artifacts
+    rebuilt from its deduplicated rows (see write_store). Nothing is done when no file was added, removed or modified, and the
+    currency conversion table is unchanged, since the last ingestion.
+
+    Parameters:
+    - source (str): Directory holding the raw CSVs, or a glob pattern matching them.
+    - workers (int, optional): Number of worker processes; defaults to the number of CPUs.
+    - chunksize (int, optional): Number of raw rows a worker processes at a time.
+    - memory_limit_mb (float, optional): Approximate peak memory budget of the whole ingestion, shared
+      by the workers; used to derive `chunksize` from the first file.
+    - output_path, manifest_path, rollup_path, cuisines_path, sketches_path (str): Where the artifacts
+      are written.
+
+    Returns:
+    - str: "unchanged" or "rebuilt".
+    """
+
+    files = resolve_sources(source)
+    if not files:
+        raise FileNotFoundError(f"No raw CSV files match {source!r}")
+
+    fingerprint = sources_fingerprint(files)
+    rates_sha256 = file_fingerprint(CURRENCY_RATES_PATH)["sha256"]
+    manifest = read_manifest(manifest_path)
+    if (manifest is not None
+            and manifest.get("sources") == fingerprint
+            and manifest.get("currency_rates_sha256") == rates_sha256
+            and all(os.path.exists(p) for p in (output_path, rollup_path, cuisines_path, sketches_path))):
+        return "unchanged"
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None and memory_limit_mb is not None:
+        chunksize = estimate_chunksize(files[0], memory_limit_mb / workers)
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path) or ".") as directory, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        # Results come in file order while the next files are transformed; at most 2 per worker are in
+        # flight, so at most that many files' temporary artifacts are on disk at a time.
+        transform = functools.partial(transform_file, directory=directory, chunksize=chunksize)
+        built = ordered_results(executor, transform, files, 2 * workers)
+        rejected_ids = write_store(removed_after_use(built),
+                                   output_path, rollup_path, cuisines_path, sketches_path=sketches_path)
+
+    write_manifest({"sources": fingerprint, "currency_rates_sha256": rates_sha256,
+                    "rejected_ids": [int(i) for i in rejected_ids]}, manifest_path)
+
+    return "rebuilt"
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest raw Zomato exports and publish the processed store.")
+    parser.add_argument("source", help="Directory of raw CSV files or a glob pattern")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=None, help="Raw rows a worker processes at a time")
+    parser.add_argument("--memory-limit-mb", type=float, default=None, help="Approximate peak memory budget")
+    args = parser.parse_args()
+
+    status, version = publish(lambda paths: ingest_raw_files(
+        args.source, workers=args.workers, output_path=paths["store"], manifest_path=paths["manifest"],
+        rollup_path=paths["rollup"], cuisines_path=paths["cuisines"], sketches_path=paths["sketches"],
+        chunksize=args.chunksize, memory_limit_mb=args.memory_limit_mb,
+    ))
+    print(status, version)
+
+if __name__ == "__main__":
+    main()
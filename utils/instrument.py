@@ -0,0 +1,169 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+
+# Off by default. FOME_ZERO_PROFILE=1 logs spans to PROFILE_LOG_PATH; FOME_ZERO_PROFILE=panel also shows
+# the spans of each rerun in a collapsible sidebar panel.
+PROFILE_ENV = "FOME_ZERO_PROFILE"
+
+PROFILE_LOG_PATH = os.environ.get("FOME_ZERO_PROFILE_LOG", "logs/profile.jsonl")
+
+_mode = os.environ.get(PROFILE_ENV, "").strip().lower()
+_enabled = _mode not in ("", "0", "false", "off")
+_panel = _mode == "panel"
+
+_log_lock = threading.Lock()
+
+# Per thread (Streamlit runs each rerun of a session in its own script thread): the current run and
+# its spans, and the stack of open spans.
+_local = threading.local()
+
+_NOOP = contextlib.nullcontext()
+
+def enable(panel=False):
+    global _enabled, _panel
+    _enabled, _panel = True, panel
+
+def disable():
+    global _enabled, _panel
+    _enabled, _panel = False, False
+
+def is_enabled():
+    return _enabled
+
+def _rss_bytes():
+    """Resident set size of the process, from /proc on Linux; 0 where it is not available."""
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+def _write(record):
+    with _log_lock:
+        os.makedirs(os.path.dirname(PROFILE_LOG_PATH) or ".", exist_ok=True)
+        with open(PROFILE_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+@contextlib.contextmanager
+def _span(name, fields):
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    rss = _rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        record = dict(fields,
+                      ts=time.time(),
+                      run=getattr(_local, "run", None),
+                      name=name,
+                      parent=parent,
+                      depth=len(stack),
+                      seconds=seconds,
+                      rss_delta_mb=(_rss_bytes() - rss) / 2 ** 20)
+        spans = getattr(_local, "spans", None)
+        if spans is not None:
+            spans.append(record)
+        _write(record)
+
+def span(name, **fields):
+    """
+    Time a block and log it as one JSON line: name, parent span, duration, RSS delta and `fields`.
+
+    When instrumentation is disabled this returns a shared no-op context manager.
+
+    Example:
+        with span("filter", countries=len(countries)):
+            cube = cube.take(...)
+    """
+
+    if not _enabled:
+        return _NOOP
+    return _span(name, fields)
+
+def instrumented(func=None, name=None):
+    """Decorator wrapping every call of a function in a span named after it (or `name`)."""
+
+    if func is None:
+        return functools.partial(instrumented, name=name)
+
+    span_name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with _span(span_name, {}):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+def begin_run(page):
+    """Start a new rerun of `page`: later spans of this thread are tagged with it and kept for the panel."""
+
+    if not _enabled:
+        return
+    _local.run = f"{page}-{uuid.uuid4().hex[:8]}"
+    _local.spans = []
+
+def run_spans():
+    """The spans recorded since the last begin_run() in this thread."""
+
+    return list(getattr(_local, "spans", None) or [])
+
+def plotly_chart(fig, **kwargs):
+    """st.plotly_chart, timed: serializing large figures is a noticeable share of a rerun."""
+
+    import streamlit as st
+
+    with span("st.plotly_chart"):
+        return st.plotly_chart(fig, **kwargs)
+
+def timing_panel():
+    """Show the spans of the current rerun in a collapsible sidebar panel, when the panel is enabled."""
+
+    if not (_enabled and _panel):
+        return
+
+    import pandas as pd
+    import streamlit as st
+
+    from .figures import figure_cache_stats
+    from .loader import cache_stats
+    from .memo import aggregate_cache_stats
+
+    spans = run_spans()
+    with st.sidebar.expander("Timings"):
+        if not spans:
+            st.caption("No spans recorded in this run.")
+            return
+        # Spans are recorded when they close; list them in the order they were opened.
+        table = pd.DataFrame(spans)
+        table = table.iloc[(table["ts"] - table["seconds"]).argsort(kind="stable")]
+        st.dataframe(pd.DataFrame({
+            "span": table["depth"].map(lambda depth: "· " * depth) + table["name"],
+            "ms": (table["seconds"] * 1000).round(1),
+            "RSS Δ MB": table["rss_delta_mb"].round(1),
+        }), hide_index=True, use_container_width=True)
+        top_level = table.loc[table["depth"] == 0, "seconds"].sum()
+        st.caption(f"Instrumented total: {top_level * 1000:,.0f} ms")
+
+        for label, stats in (("Figure cache", figure_cache_stats()), ("Aggregate cache", aggregate_cache_stats())):
+            st.caption(f"{label}: {stats['hit_rate']:.0%} hits, {stats['entries']:,} entries, "
+                       f"{stats['bytes'] / 2 ** 20:,.1f} of {stats['max_bytes'] / 2 ** 20:,.0f} MB, "
+                       f"{stats['evictions']:,} evictions")
+        stats = cache_stats()
+        st.caption(f"Dataset cache: {stats['hit_rate']:.0%} hits, "
+                   f"{stats['cached_columns']:,} columns, {stats['cached_bytes'] / 2 ** 20:,.1f} MB, "
+                   f"{stats['invalidations']:,} invalidations")
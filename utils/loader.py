@@ -0,0 +1,332 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .cuisines import load_cuisine_table
+from .helpers import DERIVED_COLUMNS, artifact_paths, current_version, load_data
+from .index import FILTER_COLUMNS, build_filter_index
+from .instrument import instrumented
+from .sketch import SKETCHES, distinct_counts, load_sketches
+from .spatial import build_spatial_index
+
+_lock = threading.RLock()
+
+# Text columns with at most this share of distinct values are dictionary-encoded in memory; the
+# others are held as Arrow strings, already several times smaller than Python string objects.
+DICTIONARY_MAX_DISTINCT = 0.5
+
+# file_path -> {"fingerprint": (size, mtime_ns), "columns": {name: pandas.Series}, "schema": pyarrow.Schema,
+#               "artifacts": {name: object built from this version of the store}}
+_cache = {}
+
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+# Version whose files the cache currently holds.
+_served = {"version": None}
+
+def published_path(artifact="store"):
+    """
+    Path of an artifact (see helpers.ARTIFACT_FILES) of the published version. The serving side only
+    ever reads these; they are written by `python -m utils.build`.
+
+    When a new version has been published, cached data of the older ones is dropped.
+    """
+
+    version = current_version()
+    with _lock:
+        if version != _served["version"]:
+            if _cache:
+                _stats["invalidations"] += 1
+            _cache.clear()
+            _served["version"] = version
+    return artifact_paths(version)[artifact]
+
+# Shown by every page, and raised by the report builder, while dataset_available() is False.
+NO_DATASET_MESSAGE = "No processed dataset has been published yet: run `python -m utils.build` first."
+
+def dataset_available():
+    return os.path.exists(published_path("store"))
+
+def store_fingerprint(file_path=None):
+    stat = os.stat(file_path or published_path("store"))
+    return (stat.st_size, stat.st_mtime_ns)
+
+def dataset_version(file_path=None):
+    """Identifier of the served dataset: the published version, or a fingerprint of an unversioned store."""
+
+    if file_path is None:
+        version = current_version()
+        if version is not None:
+            return version
+    size, mtime_ns = store_fingerprint(file_path)
+    return f"{mtime_ns:x}-{size:x}"
+
+def _freeze(series):
+    """Mark the arrays backing a cached column read-only so no session can mutate the shared copy."""
+
+    values = series.array
+    # numpy-backed arrays and categoricals (whose `codes` is a fresh read-only view of `_ndarray`)
+    if hasattr(values, "_ndarray"):
+        values._ndarray.flags.writeable = False
+    return series
+
+def _share(series):
+    """
+    A cached column as handed out to a caller.
+
+    Arrow buffers are immutable, but an in-place write swaps the chunked array held by the
+    ArrowStringArray, so every caller gets its own zero-copy wrapper; frozen arrays are shared as is.
+    """
+
+    values = series.array
+    if isinstance(values, pd.arrays.ArrowStringArray):
+        return pd.Series(pd.arrays.ArrowStringArray(values.__arrow_array__()), index=series.index, name=series.name)
+    return series
+
+def _cached_entry(file_path):
+    fingerprint = store_fingerprint(file_path)
+    entry = _cache.get(file_path)
+    if entry is None or entry["fingerprint"] != fingerprint:
+        if entry is not None:
+            _stats["invalidations"] += 1
+        entry = {"fingerprint": fingerprint, "columns": {}, "artifacts": {}}
+        _cache[file_path] = entry
+    return entry
+
+def _text_column(chunked):
+    """A Parquet string column as Arrow strings, dictionary-encoded when values repeat; no Python string is created."""
+
+    chunked = chunked.cast(pa.string())
+    distinct = pc.count_distinct(chunked).as_py()
+    if distinct > len(chunked) * DICTIONARY_MAX_DISTINCT:
+        return pd.arrays.ArrowStringArray(chunked)
+
+    # Sorted categories, like the categorical columns of the store (see helpers.load_data).
+    categories = pc.drop_null(pc.unique(chunked))
+    categories = categories.take(pc.array_sort_indices(categories))
+    codes = pc.index_in(chunked, value_set=categories).fill_null(-1).to_numpy()
+    dtype = pd.CategoricalDtype(pd.Index(pd.arrays.ArrowStringArray(categories)))
+    return pd.Categorical.from_codes(codes, dtype=dtype)
+
+def _read_compact(file_path, columns, schema):
+    """
+    Read columns of the restaurant table in their compact in-memory form: text as Arrow strings or
+    dictionaries (see _text_column), integers in the smallest dtype holding their range. Floats are
+    kept as they are, float32 would change the printed ratings and coordinates.
+    """
+
+    text = [column for column in columns if pa.types.is_string(schema.field(column).type)
+            or pa.types.is_large_string(schema.field(column).type)]
+    others = [column for column in columns if column not in text]
+
+    result = {}
+    if text:
+        table = pq.read_table(file_path, columns=text)
+        for column in text:
+            result[column] = pd.Series(_text_column(table.column(column)), name=column)
+    if others:
+        df = load_data(columns=others, file_path=file_path)
+        for column in others:
+            series = df[column]
+            if pd.api.types.is_integer_dtype(series.dtype):
+                series = pd.to_numeric(series, downcast="integer")
+            result[column] = series
+    return result
+
+def derive_column(source, column):
+    """
+    A DERIVED_COLUMNS column computed from its source column, as the categorical the ETL stores.
+
+    Only the distinct source values go through the mapping, so this costs one factorization of the
+    source, a few milliseconds per million rows.
+    """
+
+    _, derive = DERIVED_COLUMNS[column]
+    codes, uniques = pd.factorize(source, sort=True)
+    labels = pd.Categorical(derive(pd.Series(np.asarray(uniques))))
+    values = pd.Categorical.from_codes(labels.codes[codes], dtype=labels.dtype)
+    return pd.Series(values, index=source.index, name=column)
+
+@instrumented
+def load_dataset(columns=None, file_path=None, compact=True):
+    """
+    Return the processed dataset from a process-wide cache shared by every page and session.
+
+    Columns are cached individually, so each one is read from disk at most once per version of the
+    store and different pages asking for different projections share the same arrays; text columns
+    only take memory once a view asks for them. The cache is invalidated as soon as the store's size
+    or modification time changes.
+
+    With `compact` (the restaurant table), columns are held in a compact form (see _read_compact)
+    and DERIVED_COLUMNS are recomputed from their source on every call instead of being cached.
+
+    The returned frame is backed by read-only arrays, so writing to it in place raises (text columns
+    held as Arrow strings are private to the returned frame instead): filter or copy it.
+
+    Parameters:
+    - columns (list, optional): Columns to return; all columns by default.
+    - file_path (str, optional): Path of the processed store; the published one by default.
+    - compact (bool): Compact the columns and derive the derived ones; False for other stores,
+      such as the rollup cube whose measures must stay int64.
+
+    Returns:
+    - pandas.DataFrame: The requested columns, in the requested order.
+    """
+
+    file_path = file_path or published_path("store")
+    with _lock:
+        entry = _cached_entry(file_path)
+        cached = entry["columns"]
+
+        if "schema" not in entry:
+            entry["schema"] = pq.read_schema(file_path)
+        schema = entry["schema"]
+        if columns is None:
+            columns = schema.names
+
+        derived = {}
+        if compact:
+            derived = {column: DERIVED_COLUMNS[column][0] for column in columns
+                       if column in DERIVED_COLUMNS and DERIVED_COLUMNS[column][0] in schema.names}
+        stored = [column for column in columns if column not in derived] + list(derived.values())
+        missing = list(dict.fromkeys(column for column in stored if column not in cached))
+        if missing:
+            _stats["misses"] += 1
+            if compact:
+                loaded = _read_compact(file_path, missing, schema)
+            else:
+                loaded = load_data(columns=missing, file_path=file_path)
+            for column in missing:
+                cached[column] = _freeze(loaded[column])
+        else:
+            _stats["hits"] += 1
+
+        return pd.concat([derive_column(cached[derived[column]], column) if column in derived
+                          else _share(cached[column])
+                          for column in columns], axis=1, copy=False)
+
+def cached_artifact(name, build, file_path=None):
+    """
+    Return a structure derived from the store (an index, a lookup table...), building it once per
+    version of the store and sharing it across sessions like the dataset itself.
+
+    Parameters:
+    - name (str): Cache key of the artifact.
+    - build (callable): Builds the artifact; called without arguments on a miss.
+    - file_path (str, optional): File the artifact is derived from (the published store by default);
+      it is dropped when that file changes.
+
+    Returns:
+    - object: The artifact.
+    """
+
+    file_path = file_path or published_path("store")
+    with _lock:
+        artifacts = _cached_entry(file_path)["artifacts"]
+        if name in artifacts:
+            _stats["hits"] += 1
+        else:
+            _stats["misses"] += 1
+            artifacts[name] = build()
+        return artifacts[name]
+
+@instrumented
+def load_filter_index(artifact="store"):
+    """
+    The inverted filter index (see utils.index) over the sidebar filter columns of a store: the
+    processed dataset by default, or the rollup cube with `artifact="rollup"`.
+    """
+
+    file_path = published_path(artifact)
+    return cached_artifact(
+        "filter_index",
+        lambda: build_filter_index(load_dataset(columns=FILTER_COLUMNS, file_path=file_path,
+                                                compact=artifact == "store")),
+        file_path=file_path,
+    )
+
+@instrumented
+def load_cuisines():
+    """The restaurant <-> cuisine table (see utils.cuisines), aligned with the rows of the dataset."""
+
+    file_path = published_path("cuisines")
+    return cached_artifact("cuisine_table", lambda: load_cuisine_table(file_path), file_path=file_path)
+
+@instrumented
+def load_spatial_index():
+    """The grid index over restaurant coordinates (see utils.spatial), built once per dataset version."""
+
+    def build():
+        coordinates = load_dataset(columns=["latitude", "longitude"])
+        return build_spatial_index(coordinates["latitude"], coordinates["longitude"])
+
+    return cached_artifact("spatial_index", build)
+
+@instrumented
+def load_rollup(columns=None):
+    """The rollup cube (see utils.rollup), served from the same cache as the dataset."""
+
+    return load_dataset(columns=columns, file_path=published_path("rollup"), compact=False)
+
+@instrumented
+def load_distinct_sketches():
+    """The distinct-count sketches (see utils.sketch) written by the ETL next to the store."""
+
+    file_path = published_path("sketches")
+    return cached_artifact("sketches", lambda: load_sketches(file_path), file_path=file_path)
+
+@instrumented
+def count_distinct(name, by=None, where=None, exact=False):
+    """
+    Number of distinct values counted by one of the SKETCHES, e.g. "cities_by_country".
+
+    Estimates come from the HyperLogLog sketches, whose size does not depend on the number of
+    restaurants. With `exact=True` the distinct values are counted in the rollup cube instead.
+
+    Parameters:
+    - name (str): Key of utils.sketch.SKETCHES.
+    - by (str or list, optional): Key column(s) to count per; a single total by default.
+    - where (dict, optional): Key column -> allowed values, e.g. {"country": ["Brazil"]}.
+    - exact (bool): Count exactly instead of estimating.
+
+    Returns:
+    - int or pandas.Series: The distinct count(s).
+    """
+
+    if not exact:
+        return distinct_counts(load_distinct_sketches()[name], by=by, where=where)
+
+    column, keys = SKETCHES[name]
+    cube = load_rollup(columns=keys + [column])
+    for key, values in (where or {}).items():
+        cube = cube[cube[key].isin(values)]
+    if by is None:
+        return int(cube[column].nunique())
+    return cube.groupby(by, observed=True)[column].nunique().rename("distinct")
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _served["version"] = None
+
+def cache_stats():
+    """Hit/miss/invalidation counters and hit rate, plus the number of cached columns and their memory footprint."""
+
+    with _lock:
+        series = [s for entry in _cache.values() for s in entry["columns"].values()]
+        lookups = _stats["hits"] + _stats["misses"]
+        return dict(_stats,
+                    hit_rate=_stats["hits"] / lookups if lookups else 0.0,
+                    cached_columns=len(series),
+                    cached_bytes=int(sum(s.memory_usage(deep=True, index=False) for s in series)))
+
+def bytes_per_row(df):
+    """Memory per row of each column of `df`, string payloads included, plus a "total" entry."""
+
+    usage = df.memory_usage(deep=True, index=False) / max(len(df), 1)
+    return pd.concat([usage, pd.Series({"total": usage.sum()})])
@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+def new_lru(max_bytes):
+    """
+    A thread-safe LRU cache bounded by the total size of its values rather than by their number.
+
+    Returns:
+    - dict: The cache state, to pass to the other lru_* functions.
+    """
+
+    return {
+        "entries": OrderedDict(),  # key -> (value, size in bytes), least recently used first
+        "bytes": 0,
+        "max_bytes": max_bytes,
+        "lock": threading.Lock(),
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0,
+    }
+
+def lru_get(cache, key, default=None):
+    with cache["lock"]:
+        entry = cache["entries"].get(key, _MISSING)
+        if entry is _MISSING:
+            cache["misses"] += 1
+            return default
+        cache["entries"].move_to_end(key)
+        cache["hits"] += 1
+        return entry[0]
+
+def lru_put(cache, key, value, size):
+    """Store `value`, evicting least recently used entries until the cache fits its budget again."""
+
+    with cache["lock"]:
+        entries = cache["entries"]
+        if key in entries:
+            cache["bytes"] -= entries.pop(key)[1]
+        if size > cache["max_bytes"]:
+            # Larger than the whole budget: caching it would flush everything else.
+            return value
+        entries[key] = (value, size)
+        cache["bytes"] += size
+        while cache["bytes"] > cache["max_bytes"]:
+            _, (_, evicted_size) = entries.popitem(last=False)
+            cache["bytes"] -= evicted_size
+            cache["evictions"] += 1
+        return value
+
+def lru_clear(cache):
+    with cache["lock"]:
+        cache["entries"].clear()
+        cache["bytes"] = 0
+
+def lru_stats(cache):
+    with cache["lock"]:
+        lookups = cache["hits"] + cache["misses"]
+        return {
+            "hits": cache["hits"],
+            "misses": cache["misses"],
+            "evictions": cache["evictions"],
+            "hit_rate": cache["hits"] / lookups if lookups else 0.0,
+            "entries": len(cache["entries"]),
+            "bytes": cache["bytes"],
+            "max_bytes": cache["max_bytes"],
+        }
@@ -0,0 +1,284 @@
+import contextlib
+import glob
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .instrument import instrumented
+
+MAP_COLUMNS = [
+    "restaurant_name", "latitude", "longitude", "average_cost_for_two", "currency",
+    "average_cost_for_two_usd", "cuisines", "aggregate_rating", "color_name",
+]
+
+# Above this many restaurants in view, the map shows grid clusters precomputed for every zoom level
+# below DETAIL_ZOOM, and only the individual restaurants in view once zoomed in to DETAIL_ZOOM.
+MAP_MAX_MARKERS = 10000
+
+# Zoom level from which individual restaurants are shown: a view then spans a city district.
+DETAIL_ZOOM = 13
+
+# Grid clusters are sized like Leaflet's marker clusters: about 64px, i.e. 4 per 256px tile.
+CLUSTER_CELLS_PER_TILE = 4
+
+MAP_CACHE_DIR = "data/processed/maps"
+
+_lock = threading.Lock()
+
+# version -> rendered HTML of the most recently served map
+_html_cache = {}
+
+# Draws the clusters of the current zoom level, or the individual restaurants in view from the detail
+# zoom on, into the parent layer; redrawn whenever the map moves. `levels` maps a zoom level to rows of
+# [latitude, longitude, restaurants, mean rating] and `markers` holds MARKER_CALLBACK rows (or null).
+ZOOM_CLUSTERS_TEMPLATE = """
+{% macro script(this, kwargs) %}
+(function () {
+    var layer = {{ this._parent.get_name() }};
+    var map = {{ this._parent._parent.get_name() }};
+    var levels = {{ this.levels|tojson }};
+    var markers = {{ this.markers|tojson }};
+    var detailZoom = {{ this.detail_zoom }};
+    var drawn = null;
+
+    function draw() {
+        var zoom = Math.min(map.getZoom(), detailZoom);
+        if (zoom < detailZoom || markers === null) {
+            zoom = Math.min(zoom, detailZoom - 1);
+            if (zoom === drawn) {
+                return;
+            }
+            layer.clearLayers();
+            levels[zoom].forEach(function (row) {
+                var text = row[2].toLocaleString() + " restaurants";
+                L.circleMarker([row[0], row[1]], {
+                    radius: 6 + 4 * Math.log10(row[2]), color: "#3186cc", fill: true, fillOpacity: 0.6,
+                }).bindTooltip(text)
+                  .bindPopup(text + "<br>Mean Aggregate Rating: " + row[3].toFixed(1) + "/5.0")
+                  .addTo(layer);
+            });
+        } else {
+            layer.clearLayers();
+            var bounds = map.getBounds().pad(0.5);
+            markers.forEach(function (row) {
+                if (bounds.contains([row[0], row[1]])) {
+                    var icon = L.AwesomeMarkers.icon({icon: "home", prefix: "fa", markerColor: row[3]});
+                    L.marker([row[0], row[1]], {icon: icon}).bindPopup(row[2], {maxWidth: 500}).addTo(layer);
+                }
+            });
+        }
+        drawn = zoom;
+    }
+
+    map.on("moveend", draw);
+    draw();
+})();
+{% endmacro %}
+"""
+
+MARKER_CALLBACK = """
+function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'home', prefix: 'fa', markerColor: row[3]});
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    marker.bindPopup(row[2], {maxWidth: 500});
+    return marker;
+};
+"""
+
+def popup_html(dataframe):
+    """Popup content for every restaurant, built with vectorized string operations."""
+
+    return (
+        "<p><strong>" + dataframe["restaurant_name"].astype(str) + "</strong></p>"
+        + "<br>Price: " + dataframe["average_cost_for_two"].astype(str)
+        + ",00 (" + dataframe["currency"].astype(str) + ") for two"
+        + ", about US$ " + dataframe["average_cost_for_two_usd"].map("{:.2f}".format)
+        + "<br>Type: " + dataframe["cuisines"].astype(str)
+        + "<br>Aggragate Rating: " + dataframe["aggregate_rating"].astype(str) + "/5.0"
+    )
+
+def marker_payload(dataframe):
+    """Rows of [latitude, longitude, popup, color] consumed by MARKER_CALLBACK in the browser."""
+
+    payload = pd.DataFrame({
+        "latitude": dataframe["latitude"].to_numpy(),
+        "longitude": dataframe["longitude"].to_numpy(),
+        "popup": popup_html(dataframe).to_numpy(),
+        "color": dataframe["color_name"].astype(str).to_numpy(),
+    })
+    return payload.values.tolist()
+
+def within_bounds(dataframe, bounds):
+    """
+    Split restaurants by whether they fall inside `bounds`, given as ((south, west), (north, east)).
+
+    Returns:
+    - numpy.ndarray: Boolean mask of the restaurants inside the bounds.
+    """
+
+    (south, west), (north, east) = bounds
+    latitude = dataframe["latitude"].to_numpy()
+    longitude = dataframe["longitude"].to_numpy()
+    inside = (latitude >= south) & (latitude <= north)
+    if west <= east:
+        inside &= (longitude >= west) & (longitude <= east)
+    else:
+        # The bounds cross the antimeridian.
+        inside &= (longitude >= west) | (longitude <= east)
+    return inside
+
+def grid_clusters(dataframe, zoom):
+    """
+    Aggregate restaurants into square grid cells sized for the given Leaflet zoom level.
+
+    Parameters:
+    - dataframe (pandas.DataFrame): Restaurants with latitude, longitude and aggregate_rating.
+    - zoom (int): Leaflet zoom level the clusters are meant to be displayed at.
+
+    Returns:
+    - pandas.DataFrame: One row per non-empty cell with its restaurant count, centroid and mean rating.
+    """
+
+    cell = 360 / (2 ** zoom * CLUSTER_CELLS_PER_TILE)
+    cells = pd.DataFrame({
+        "row": np.floor(dataframe["latitude"].to_numpy() / cell).astype("int64"),
+        "col": np.floor(dataframe["longitude"].to_numpy() / cell).astype("int64"),
+        "latitude": dataframe["latitude"].to_numpy(),
+        "longitude": dataframe["longitude"].to_numpy(),
+        "aggregate_rating": dataframe["aggregate_rating"].to_numpy(),
+    })
+    return (cells.groupby(["row", "col"])
+                 .agg(restaurants=("latitude", "size"),
+                      latitude=("latitude", "mean"),
+                      longitude=("longitude", "mean"),
+                      mean_aggregate_rating=("aggregate_rating", "mean"))
+                 .reset_index(drop=True))
+
+def zoom_levels(dataframe, detail_zoom=DETAIL_ZOOM):
+    """
+    Grid clusters of the restaurants for every zoom level below `detail_zoom`, as compact rows of
+    [latitude, longitude, restaurants, mean aggregate rating] by zoom level.
+    """
+
+    levels = {}
+    for zoom in range(detail_zoom):
+        clusters = grid_clusters(dataframe, zoom)
+        levels[zoom] = np.column_stack([
+            clusters["latitude"].round(5), clusters["longitude"].round(5),
+            clusters["restaurants"], clusters["mean_aggregate_rating"].round(2),
+        ]).tolist()
+    return levels
+
+def zoom_clusters(levels, markers=None, detail_zoom=DETAIL_ZOOM):
+    """
+    Map element switching between the precomputed cluster `levels` as the map is zoomed (see
+    ZOOM_CLUSTERS_TEMPLATE); from `detail_zoom` on, the `markers` in view are drawn instead. Add it to
+    a FeatureGroup of the map.
+    """
+
+    from branca.element import MacroElement, Template
+
+    element = MacroElement()
+    element._template = Template(ZOOM_CLUSTERS_TEMPLATE)
+    element.levels, element.markers, element.detail_zoom = levels, markers, detail_zoom
+    return element
+
+@instrumented
+def build_map(dataframe, max_markers=MAP_MAX_MARKERS, bounds=None, detail_zoom=DETAIL_ZOOM):
+    """
+    Build the restaurant map without creating a Python object per restaurant.
+
+    Restaurants inside `bounds` (all of them when no bounds are given) are sent to the browser as one
+    compact data array. Up to `max_markers` of them are clustered client-side by FastMarkerCluster;
+    above that, grid clusters precomputed for every zoom level below `detail_zoom` are shown instead,
+    and the individual restaurants in view once the map is zoomed in to `detail_zoom`. Restaurants
+    outside `bounds` are only shown as precomputed grid clusters.
+
+    Parameters:
+    - dataframe (pandas.DataFrame): Restaurants with the MAP_COLUMNS columns.
+    - max_markers (int): Maximum number of restaurants clustered client-side.
+    - bounds (tuple, optional): Visible area as ((south, west), (north, east)).
+    - detail_zoom (int): Zoom level from which individual restaurants replace the grid clusters.
+
+    Returns:
+    - folium.Map: The map, ready to be rendered.
+    """
+
+    # folium is only needed to build maps: when the rendered map is already cached
+    # (see cached_map_html), serving it does not import it at all.
+    import folium
+    import folium.plugins
+
+    m = folium.Map(max_bounds=True, tiles="CartoDB positron")
+
+    if bounds is None:
+        inside = np.ones(len(dataframe), dtype=bool)
+    else:
+        inside = within_bounds(dataframe, bounds)
+        m.fit_bounds(bounds)
+
+    visible = dataframe[inside]
+    if len(visible) <= max_markers:
+        folium.plugins.FastMarkerCluster(marker_payload(visible), callback=MARKER_CALLBACK,
+                                         name="Restaurants").add_to(m)
+    else:
+        zoom_clusters(zoom_levels(visible, detail_zoom), marker_payload(visible), detail_zoom).add_to(
+            folium.FeatureGroup(name="Restaurants").add_to(m))
+
+    if not inside.all():
+        zoom_clusters(zoom_levels(dataframe[~inside], detail_zoom), detail_zoom=detail_zoom).add_to(
+            folium.FeatureGroup(name="Other areas").add_to(m))
+
+    folium.LayerControl().add_to(m)
+    return m
+
+@instrumented
+def render_map_html(m):
+    """Standalone HTML page for a map, the same document `streamlit_folium.folium_static` embeds."""
+
+    import folium
+
+    return folium.Figure().add_child(m).render()
+
+@instrumented
+def cached_map_html(version, build, cache_dir=MAP_CACHE_DIR):
+    """
+    Rendered map HTML for a dataset version, built at most once per version and shared by all sessions.
+
+    The HTML is kept in memory and on disk under `cache_dir`, so a restarted server does not rebuild it
+    either. Artifacts of older versions are removed when a new one is written.
+
+    Parameters:
+    - version (str): Dataset version the map is built from (see utils.loader.dataset_version).
+    - build (callable): Returns the folium.Map; only called when no artifact exists for `version`.
+    - cache_dir (str): Directory holding the HTML artifacts.
+
+    Returns:
+    - str: The map HTML.
+    """
+
+    with _lock:
+        if version in _html_cache:
+            return _html_cache[version]
+
+        path = os.path.join(cache_dir, f"map_{version}.html")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                html = f.read()
+        else:
+            html = render_map_html(build())
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+            for stale in glob.glob(os.path.join(cache_dir, "map_*.html")):
+                if stale != path:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(stale)
+
+        _html_cache.clear()
+        _html_cache[version] = html
+        return html
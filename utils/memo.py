@@ -0,0 +1,64 @@
+import os
+
+from .figures import normalize_selection
+from .instrument import span
+from .loader import dataset_version
+from .lru import lru_clear, lru_get, lru_put, lru_stats, new_lru
+from .rollup import rollup_mean
+
+# Total size of the memoized aggregates kept in memory; a per-city mean is a few hundred KB at most.
+AGGREGATE_CACHE_MB = float(os.environ.get("FOME_ZERO_AGGREGATE_CACHE_MB", 32))
+
+# Shared by every session of the server process.
+_aggregates = new_lru(int(AGGREGATE_CACHE_MB * 2 ** 20))
+
+def nbytes(value):
+    """Memory taken by a pandas or numpy result, string payloads included."""
+
+    if hasattr(value, "memory_usage"):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    return int(value.nbytes)
+
+def memoized(name, selection, build):
+    """
+    The result of an aggregation from the shared aggregate cache, built on a miss.
+
+    Entries are keyed by (dataset version, name, normalized selection), like the figure cache, so an
+    aggregate is computed once per dataset version and filter selection whatever the chart, sort order
+    or session asking for it. Results are shared: callers must not modify them in place.
+
+    Parameters:
+    - name (hashable): What is aggregated, e.g. ("rollup_mean", "country", "price_range").
+    - selection (dict): Every filter value the rows being aggregated depend on.
+    - build (callable): Computes the aggregate; only called on a miss.
+    """
+
+    key = (dataset_version(), name, normalize_selection(selection))
+    value = lru_get(_aggregates, key)
+    with span("memoized", aggregate=str(name), hit=value is not None):
+        if value is None:
+            value = build()
+            lru_put(_aggregates, key, value, nbytes(value))
+        return value
+
+def cached_rollup_mean(cube, by, metric, selection=None):
+    """
+    rollup_mean of the cube, memoized when the filter `selection` that produced the cube is given.
+
+    The mean of every group is stored, not a sorted or truncated view of it, so the highest and
+    lowest variants of a chart share one groupby.
+    """
+
+    if selection is None:
+        return rollup_mean(cube, by, metric)
+    name = ("rollup_mean", by if isinstance(by, str) else tuple(by), metric)
+    return memoized(name, selection, lambda: rollup_mean(cube, by, metric))
+
+def aggregate_cache_stats():
+    """Hits, misses, evictions, hit rate, entries and bytes of the shared aggregate cache."""
+
+    return lru_stats(_aggregates)
+
+def clear_aggregate_cache():
+    lru_clear(_aggregates)
@@ -0,0 +1,315 @@
+import argparse
+import html
+import importlib.util
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+from .helpers import PRICE_MEASURES, get_first_order_statistics
+from .index import select_rows
+from .loader import (
+    NO_DATASET_MESSAGE,
+    count_distinct,
+    dataset_available,
+    dataset_version,
+    load_dataset,
+    load_filter_index,
+    load_rollup,
+)
+from .topk import top_k_per_group, top_k_rows
+
+PAGES = {
+    "countries": "pages/1_🌍_Countries.py",
+    "cities": "pages/2_🏙️_Cities.py",
+    "cuisines": "pages/3_🍽️_Cuisines.py",
+}
+
+REPORTS_DIR = "reports"
+
+TOP_RESTAURANTS = 10
+
+# Columns described in the statistics table of every report.
+DESCRIBED_COLUMNS = ["aggregate_rating", "votes", "price_range", "average_cost_for_two", "average_cost_for_two_usd"]
+
+TOP_RESTAURANT_COLUMNS = [
+    "restaurant_name", "country", "city", "cuisines_", "average_cost_for_two", "average_cost_for_two_usd",
+    "votes", "aggregate_rating",
+]
+
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Fome Zero - {title}</title>
+<script src="{plotly_js}"></script>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 2em; }}
+th, td {{ border: 1px solid #ddd; padding: 4px 8px; text-align: right; }}
+</style>
+</head>
+<body>
+{navigation}
+<h1>{title}</h1>
+<p>Dataset version {version}</p>
+{body}
+</body>
+</html>
+"""
+
+# Page modules of a worker process, imported once by its first report.
+_pages = {}
+
+def load_page(name, path):
+    """Import a Streamlit page by file path; page file names are not valid module names."""
+
+    spec = importlib.util.spec_from_file_location(f"pages_{name}", os.path.abspath(path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def slugify(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+def report_charts(pages, cube, selection):
+    """
+    (view, chart id, title, build) of every chart of a report, built with the chart functions of the pages.
+
+    Parameters:
+    - pages (dict): The page modules, by PAGES key.
+    - cube (pandas.DataFrame): The rollup cube for the report's countries.
+    - selection (dict): The filters that produced `cube`, so the highest and lowest city charts share
+      one groupby (see utils.memo).
+    """
+
+    countries, cities, cuisines = (pages[name] for name in ("countries", "cities", "cuisines"))
+    metrics = {"aggregate_rating": "Aggregate Rating", **PRICE_MEASURES}
+
+    charts = [
+        ("Countries", "restaurants_by_country", "Number of Restaurants by Country",
+         lambda: countries.get_barplot_count_column_by_country(cube, 'restaurant_id', 'number_of_restaurants')),
+        ("Countries", "cities_by_country", "Number of Registered Cities by Country",
+         lambda: countries.get_barplot_count_column_by_country(cube, 'city', 'number_of_cities')),
+    ]
+    for metric, label in metrics.items():
+        average = countries.calculate_average_metric_by_country(cube, metric, selection)
+        color_scale = 'Bluered_r' if metric == 'aggregate_rating' else 'Bluered'
+        charts += [
+            ("Countries", f"mean_{metric}_by_country_map", f"Average {label} of Restaurants by Country",
+             lambda average=average: countries.get_average_metric_by_country_map(average)),
+            ("Countries", f"mean_{metric}_by_country_bar", f"Average {label} of Restaurants by Country",
+             lambda average=average, color_scale=color_scale:
+                 countries.get_average_metric_by_country_barplot(average, color_scale)),
+        ]
+    for metric, label in metrics.items():
+        charts += [
+            ("Cities", f"top_mean_{metric}", f"Top 7 Cities with the Highest Mean {label}",
+             lambda metric=metric: cities.generate_top_cities_by_mean_metric(cube, metric, ascrending=False,
+                                                                             selection=selection)),
+            ("Cities", f"bottom_mean_{metric}", f"Top 7 Cities with the Lowest Mean {label}",
+             lambda metric=metric: cities.generate_top_cities_by_mean_metric(cube, metric, ascrending=True,
+                                                                             selection=selection)),
+        ]
+    charts += [
+        ("Cities", "rating_above_4_count", "Cities with the most restaurants with an average rating above 4",
+         lambda: cities.generate_top_cities_by_rating_count(cube, above=True, value=4)),
+        ("Cities", "rating_below_2_5_count", "Cities with the most restaurants with an average rating below 2.5",
+         lambda: cities.generate_top_cities_by_rating_count(cube, above=False, value=2.5)),
+        ("Cities", "unique_cuisines", "Cities with more different types of cuisine",
+         lambda: cities.generate_top_cities_by_unique_cuisines(cube)),
+    ]
+    for metric, label in metrics.items():
+        charts.append(("Cuisines", f"mean_{metric}_by_cuisine", f"Mean {label} by Cuisines",
+                       lambda metric=metric: cuisines.get_cuisines_mean_metric_barplot_fig(
+                           cube, ascending=False, metric=metric, selection=selection)))
+    return charts
+
+def shared_aggregates(countries, top_n=TOP_RESTAURANTS):
+    """
+    The overview metrics, top restaurants and statistics of every report.
+
+    Each is computed once for all reports, grouped by country, then split per report: per-country
+    reports take their group and the overall report is computed over every selected row.
+
+    Returns:
+    - dict: Report name -> {"overview", "top_restaurants", "statistics"}, the overall report first.
+    """
+
+    df = load_dataset(columns=sorted(set(TOP_RESTAURANT_COLUMNS + DESCRIBED_COLUMNS + ["restaurant_id"])))
+    df = df.take(select_rows(load_filter_index(), country=countries))
+    where = {"country": countries}
+
+    restaurants = df.groupby("country", observed=True).agg(restaurants=("restaurant_id", "size"),
+                                                           reviews=("votes", "sum"))
+    cities = count_distinct("cities_by_country", by="country", where=where, exact=True)
+    cuisines = count_distinct("cuisines_by_country", by="country", where=where, exact=True)
+    top_restaurants = top_k_per_group(df, top_n, "country", "aggregate_rating")[TOP_RESTAURANT_COLUMNS]
+    statistics = get_first_order_statistics(df[["country"] + DESCRIBED_COLUMNS], by="country")
+
+    aggregates = {
+        overall_report_name(countries): {
+            "overview": {
+                "restaurants": len(df),
+                "countries": len(countries),
+                "cities": int(count_distinct("cities_by_country", where=where, exact=True)),
+                "reviews": int(df["votes"].sum()),
+                "cuisines": int(count_distinct("cuisines_by_country", where=where, exact=True)),
+            },
+            "top_restaurants": top_k_rows(df, top_n, "aggregate_rating")[TOP_RESTAURANT_COLUMNS],
+            "statistics": get_first_order_statistics(df[DESCRIBED_COLUMNS]),
+        },
+    }
+    for country in countries:
+        aggregates[country] = {
+            "overview": {
+                "restaurants": int(restaurants.loc[country, "restaurants"]),
+                "countries": 1,
+                "cities": int(cities[country]),
+                "reviews": int(restaurants.loc[country, "reviews"]),
+                "cuisines": int(cuisines[country]),
+            },
+            "top_restaurants": top_restaurants[top_restaurants["country"] == country],
+            "statistics": statistics[statistics["country"] == country].drop(columns="country"),
+        }
+    return aggregates
+
+def overall_report_name(countries):
+    return "All Countries" if len(countries) > 1 else countries[0]
+
+def table_html(df):
+    return df.to_html(index=False, float_format=lambda value: f"{value:,.2f}", border=0)
+
+def render_report(task):
+    """
+    Render the charts of one report and write its index.html and report.json; runs in a worker process.
+
+    Parameters:
+    - task (dict): The report `name`, `slug`, `countries`, the `output_dir`, the expected dataset
+      `version` and its slice of the shared aggregates.
+
+    Returns:
+    - dict: The report's entry in the export index.
+    """
+
+    if dataset_version() != task["version"]:
+        raise RuntimeError("The published dataset changed during the export; run it again.")
+    if not _pages:
+        _pages.update({name: load_page(name, path) for name, path in PAGES.items()})
+
+    selection = {"country": task["countries"]}
+    cube = load_rollup()
+    cube = cube.take(select_rows(load_filter_index("rollup"), **selection))
+
+    sections = {}
+    charts = {}
+    for view, chart, title, build in report_charts(_pages, cube, selection):
+        fig = build()
+        charts[chart] = {"view": view, "title": title, "figure": json.loads(pio.to_json(fig, validate=False))}
+        sections.setdefault(view, []).append(f"<h3>{html.escape(title)}</h3>\n"
+                                             + fig.to_html(full_html=False, include_plotlyjs=False))
+
+    overview = task["overview"]
+    body = ["<h2>Overview</h2>", table_html(pd.DataFrame([overview]))]
+    for view, parts in sections.items():
+        body.append(f"<h2>{view}</h2>")
+        body.extend(parts)
+    body += [f"<h2>Top {len(task['top_restaurants'])} Restaurants with Highest Aggregate Rating</h2>",
+             table_html(task["top_restaurants"]),
+             "<h2>Statistics</h2>",
+             table_html(task["statistics"])]
+
+    report_dir = os.path.join(task["output_dir"], task["slug"])
+    os.makedirs(report_dir, exist_ok=True)
+    with open(os.path.join(report_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(REPORT_TEMPLATE.format(title=html.escape(task["name"]), plotly_js="../plotly.min.js",
+                                       navigation='<p><a href="../index.html">All reports</a></p>',
+                                       version=html.escape(task["version"]), body="\n".join(body)))
+    with open(os.path.join(report_dir, "report.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "name": task["name"],
+            "countries": task["countries"],
+            "dataset_version": task["version"],
+            "overview": overview,
+            "charts": charts,
+            "top_restaurants": json.loads(task["top_restaurants"].to_json(orient="records")),
+            "statistics": json.loads(task["statistics"].to_json(orient="records")),
+        }, f)
+
+    return {"name": task["name"], "slug": task["slug"], "countries": task["countries"], "charts": len(charts),
+            "path": os.path.join(task["slug"], "index.html")}
+
+def export_reports(output_dir=REPORTS_DIR, countries=None, workers=None, top_n=TOP_RESTAURANTS):
+    """
+    Render every dashboard view to static HTML and JSON, once over all the selected countries and
+    once per country.
+
+    The overview metrics, top restaurants and statistics of all reports are computed once (see
+    shared_aggregates); the charts are rendered by a process pool with the chart functions of the
+    pages, one report per task.
+
+    Parameters:
+    - output_dir (str): Where the reports are written, one directory per report plus an index.
+    - countries (list, optional): Countries to report on; every country by default.
+    - workers (int, optional): Number of worker processes; defaults to the number of CPUs.
+    - top_n (int): Number of restaurants in the top restaurants table.
+
+    Returns:
+    - list: The index entry of every report, in report order.
+    """
+
+    if not dataset_available():
+        raise FileNotFoundError(NO_DATASET_MESSAGE)
+
+    version = dataset_version()
+    known = load_dataset(columns=["country"])["country"].cat.categories.tolist()
+    if countries is None:
+        countries = known
+    if len(countries) == 0:
+        raise ValueError("No countries selected: pass at least one country, or None for all of them")
+    unknown = sorted(set(countries) - set(known))
+    if unknown:
+        raise ValueError(f"Unknown countries: {unknown}")
+    countries = sorted(set(countries))
+
+    aggregates = shared_aggregates(countries, top_n=top_n)
+    overall = overall_report_name(countries)
+    tasks = [dict(aggregates[name], name=name, slug=slugify(name), version=version, output_dir=output_dir,
+                  countries=countries if name == overall else [name])
+             for name in aggregates]
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "plotly.min.js"), "w", encoding="utf-8") as f:
+        f.write(get_plotlyjs())
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() yields results in report order while later reports are still rendering.
+        reports = list(executor.map(render_report, tasks))
+
+    links = "\n".join(f'<li><a href="{html.escape(report["path"])}">{html.escape(report["name"])}</a></li>'
+                      for report in reports)
+    with open(os.path.join(output_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(REPORT_TEMPLATE.format(title="Reports", plotly_js="plotly.min.js", navigation="",
+                                       version=html.escape(version), body=f"<ul>\n{links}\n</ul>"))
+    with open(os.path.join(output_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({"dataset_version": version, "reports": reports}, f, indent=2)
+
+    return reports
+
+def main():
+    parser = argparse.ArgumentParser(description="Export static HTML/JSON reports of every dashboard view.")
+    parser.add_argument("output_dir", nargs="?", default=REPORTS_DIR, help="Where the reports are written")
+    parser.add_argument("--countries", nargs="+", default=None, help="Countries to report on; all by default")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--top-n", type=int, default=TOP_RESTAURANTS, help="Restaurants in the top table")
+    args = parser.parse_args()
+
+    reports = export_reports(args.output_dir, countries=args.countries, workers=args.workers, top_n=args.top_n)
+    print(f"{len(reports)} reports written to {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ["country", "city", "cuisines_", "price_range"]
+
+SUM_MEASURES = [
+    "aggregate_rating", "price_range", "votes", "average_cost_for_two",
+    "has_table_booking", "has_online_delivery", "is_delivering_now", "average_cost_for_two_usd",
+]
+
+# Measures with one or two decimal places are summed as integer tenths or cents so that sums, and the
+# means derived from them, are exact no matter how cells are combined.
+SCALED_MEASURES = {"aggregate_rating": 10, "average_cost_for_two_usd": 100}
+
+# Ratings have one decimal place, so a bin per tenth (0.0 to 5.0) keeps threshold counts exact.
+RATING_BINS = 51
+
+def rating_bin_columns():
+    return [f"rating_{i:02d}" for i in range(RATING_BINS)]
+
+def build_rollup(df):
+    """
+    Pre-aggregate the processed data into one cell per country x city x cuisine x price range.
+
+    Each cell holds the number of restaurants, the sum of every measure in SUM_MEASURES and a
+    histogram of aggregate ratings, so counts, means and rating thresholds for any filter selection
+    can be answered by adding cells together.
+
+    Parameters:
+    - df (pandas.DataFrame): The processed data.
+
+    Returns:
+    - pandas.DataFrame: The rollup cube, one row per non-empty cell.
+    """
+
+    measures = df[DIMENSIONS + [m for m in SUM_MEASURES if m not in DIMENSIONS]].copy()
+    # Rows read back from the store have compact integer dtypes (see optimize_dtypes): widen them so
+    # the sums cannot overflow and cubes built from either kind of rows match.
+    for column in measures.select_dtypes("integer"):
+        measures[column] = measures[column].astype("int64")
+    for metric, scale in SCALED_MEASURES.items():
+        measures[metric] = np.rint(measures[metric].to_numpy() * scale).astype("int64")
+    grouped = measures.groupby(DIMENSIONS, observed=True)
+
+    cube = grouped.size().rename("restaurants").to_frame()
+    sums = grouped[SUM_MEASURES].sum()
+    cube = cube.join(sums.add_suffix("_sum"))
+
+    bins = pd.Series(np.rint(df["aggregate_rating"].to_numpy() * 10).astype("int64"), index=df.index, name="bin")
+    histogram = (df.groupby([df[d] for d in DIMENSIONS] + [bins], observed=True)
+                   .size()
+                   .unstack("bin", fill_value=0)
+                   .reindex(columns=range(RATING_BINS), fill_value=0))
+    histogram.columns = rating_bin_columns()
+    cube = cube.join(histogram)
+
+    return compact_rollup(cube.reset_index())
+
+def compact_rollup(cube):
+    # Only the text dimensions are compacted: measures stay int64 so sums over many cells cannot overflow.
+    cube = cube.copy()
+    for column in ["country", "city", "cuisines_"]:
+        cube[column] = cube[column].astype("category")
+    return cube
+
+def merge_rollups(cubes):
+    """Combine cubes built from disjoint sets of restaurants into a single cube."""
+
+    cube = pd.concat(cubes, ignore_index=True)
+    for column in ["country", "city", "cuisines_"]:
+        cube[column] = cube[column].astype(str)
+    measures = cube.columns.drop(DIMENSIONS)
+    merged = cube.groupby(DIMENSIONS)[list(measures)].sum().reset_index()
+    return compact_rollup(merged)
+
+def rollup_count(cube, by):
+    """Number of restaurants per group."""
+
+    return cube.groupby(by, observed=True)["restaurants"].sum()
+
+def rollup_nunique(cube, by, column):
+    """
+    Number of distinct values of `column` per group. Restaurant IDs are unique in the processed data,
+    so their distinct count is the restaurant count; any other column must be a cube dimension.
+    """
+
+    if column == "restaurant_id":
+        return rollup_count(cube, by)
+    return cube.groupby(by, observed=True)[column].nunique()
+
+def rollup_mean(cube, by, metric):
+    grouped = cube.groupby(by, observed=True)[["restaurants", metric + "_sum"]].sum()
+    return grouped[metric + "_sum"] / (grouped["restaurants"] * SCALED_MEASURES.get(metric, 1))
+
+def rollup_rating_count(cube, by, above, value):
+    """Number of restaurants per group with an aggregate rating >= `value` (or <= when `above` is False)."""
+
+    thresholds = np.arange(RATING_BINS) / 10
+    selected = thresholds >= value if above else thresholds <= value
+    columns = [c for c, keep in zip(rating_bin_columns(), selected) if keep]
+    counts = cube.groupby(by, observed=True)[columns].sum().sum(axis=1)
+    return counts[counts > 0]
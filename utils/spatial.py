@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+
+from .cuisines import restaurants_with_cuisines
+from .helpers import contains_sorted, price_types as price_type_names
+
+# Side of a grid cell. About 1 km at the equator: a city-wide query touches a few hundred cells
+# and a cell rarely holds more than a few thousand restaurants.
+GRID_CELL_DEGREES = 0.01
+
+EARTH_RADIUS_KM = 6371.0088
+
+# No two points on Earth are farther apart than this.
+MAX_DISTANCE_KM = np.pi * EARTH_RADIUS_KM
+
+def build_spatial_index(latitude, longitude, cell_degrees=GRID_CELL_DEGREES):
+    """
+    Build a grid index over restaurant coordinates.
+
+    The globe is cut into square cells of `cell_degrees`, numbered row by row from the south-west
+    corner. Row positions are stored grouped by cell with CSR-style offsets, so the restaurants of
+    cell `cells[i]` are positions[offsets[i]:offsets[i + 1]], and the cells of one grid row are
+    contiguous: any bounding box is one slice per grid row, found by binary search.
+
+    Parameters:
+    - latitude (array-like): Latitude of every row, in store order.
+    - longitude (array-like): Longitude of every row, in store order.
+    - cell_degrees (float): Side of a grid cell, in degrees.
+
+    Returns:
+    - dict: The sorted non-empty `cells`, their `offsets`, the row `positions` and their `latitude`
+      and `longitude` in cell order, plus the grid geometry.
+    """
+
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    n_grid_rows = int(np.ceil(180 / cell_degrees))
+    n_grid_cols = int(np.ceil(360 / cell_degrees))
+
+    cell_ids = (_grid_row(latitude, cell_degrees, n_grid_rows) * n_grid_cols
+                + _grid_col(longitude, cell_degrees, n_grid_cols))
+    positions = np.argsort(cell_ids, kind="stable")
+    cells, starts = np.unique(cell_ids[positions], return_index=True)
+
+    return {
+        "cell_degrees": cell_degrees,
+        "n_grid_rows": n_grid_rows,
+        "n_grid_cols": n_grid_cols,
+        "cells": cells,
+        "offsets": np.append(starts, len(positions)).astype(np.int64),
+        "positions": positions.astype(np.int32 if len(positions) < 2 ** 31 else np.int64),
+        "latitude": latitude[positions],
+        "longitude": longitude[positions],
+    }
+
+def _grid_row(latitude, cell_degrees, n_grid_rows):
+    return np.clip(np.floor((np.asarray(latitude) + 90) / cell_degrees), 0, n_grid_rows - 1).astype(np.int64)
+
+def _grid_col(longitude, cell_degrees, n_grid_cols):
+    return np.clip(np.floor((np.asarray(longitude) + 180) / cell_degrees), 0, n_grid_cols - 1).astype(np.int64)
+
+def _box_entries(index, south, west, north, east):
+    """Entries (offsets into the cell-ordered arrays) of the cells overlapping a box with west <= east."""
+
+    cell_degrees = index["cell_degrees"]
+    rows = np.arange(_grid_row(south, cell_degrees, index["n_grid_rows"]),
+                     _grid_row(north, cell_degrees, index["n_grid_rows"]) + 1)
+    first = rows * index["n_grid_cols"] + _grid_col(west, cell_degrees, index["n_grid_cols"])
+    last = rows * index["n_grid_cols"] + _grid_col(east, cell_degrees, index["n_grid_cols"])
+
+    starts = index["offsets"][np.searchsorted(index["cells"], first, side="left")]
+    stops = index["offsets"][np.searchsorted(index["cells"], last, side="right")]
+    lengths = stops - starts
+    # Concatenate the slices without a Python loop, as in cuisines.aggregate_by_cuisine.
+    return np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+
+def _bounds_entries(index, bounds):
+    (south, west), (north, east) = bounds
+    if west <= east:
+        return _box_entries(index, south, west, north, east)
+    # The box crosses the antimeridian.
+    return np.concatenate([_box_entries(index, south, west, north, 180),
+                           _box_entries(index, south, -180, north, east)])
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Great-circle distance in km from one point to many."""
+
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def radius_bounds(latitude, longitude, radius_km):
+    """Smallest ((south, west), (north, east)) box containing the circle of `radius_km` around a point."""
+
+    angle = np.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = latitude - angle, latitude + angle
+    if south <= -90 or north >= 90 or np.sin(radius_km / EARTH_RADIUS_KM) >= np.cos(np.radians(latitude)):
+        # The circle contains a pole: every longitude is in range.
+        return (max(south, -90), -180), (min(north, 90), 180)
+    spread = np.degrees(np.arcsin(np.sin(radius_km / EARTH_RADIUS_KM) / np.cos(np.radians(latitude))))
+    west, east = longitude - spread, longitude + spread
+    # Wrap into [-180, 180]; west > east then means the box crosses the antimeridian.
+    return (south, (west + 180) % 360 - 180), (north, (east + 180) % 360 - 180)
+
+def query_bbox(index, bounds, keep=None):
+    """
+    Restaurants inside a bounding box.
+
+    Parameters:
+    - index (dict): The spatial index from build_spatial_index.
+    - bounds (tuple): ((south, west), (north, east)); west > east crosses the antimeridian.
+    - keep (callable, optional): Receives candidate row positions, returns a boolean mask of the ones
+      to keep (see restaurant_filter).
+
+    Returns:
+    - numpy.ndarray: Sorted row positions, suitable for DataFrame.take.
+    """
+
+    (south, west), (north, east) = bounds
+    entries = _bounds_entries(index, bounds)
+    latitude, longitude = index["latitude"][entries], index["longitude"][entries]
+    inside = (latitude >= south) & (latitude <= north)
+    if west <= east:
+        inside &= (longitude >= west) & (longitude <= east)
+    else:
+        inside &= (longitude >= west) | (longitude <= east)
+    positions = index["positions"][entries[inside]]
+    if keep is not None:
+        positions = positions[keep(positions)]
+    return np.sort(positions)
+
+def query_radius(index, latitude, longitude, radius_km, keep=None):
+    """
+    Restaurants within `radius_km` of a point, nearest first (ties by position).
+
+    Only the grid cells overlapping the circle's bounding box are visited.
+
+    Returns:
+    - tuple: Row positions and their distances in km.
+    """
+
+    entries = _bounds_entries(index, radius_bounds(latitude, longitude, radius_km))
+    distances = haversine_km(latitude, longitude, index["latitude"][entries], index["longitude"][entries])
+    within = distances <= radius_km
+    positions, distances = index["positions"][entries[within]], distances[within]
+    if keep is not None:
+        kept = keep(positions)
+        positions, distances = positions[kept], distances[kept]
+    order = np.lexsort((positions, distances))
+    return positions[order], distances[order]
+
+def nearest(index, latitude, longitude, k, keep=None, max_radius_km=MAX_DISTANCE_KM):
+    """
+    The `k` restaurants nearest to a point, optionally among those accepted by `keep`.
+
+    The search radius starts at about one grid cell and doubles until it holds `k` matches: every
+    restaurant within the radius is found, so the `k` nearest of them are the `k` nearest overall.
+
+    Parameters:
+    - index (dict): The spatial index from build_spatial_index.
+    - latitude (float), longitude (float): The point.
+    - k (int): Number of restaurants to return.
+    - keep (callable, optional): See query_bbox.
+    - max_radius_km (float): Give up beyond this distance; fewer than `k` restaurants are returned then.
+
+    Returns:
+    - tuple: Row positions and their distances in km, nearest first.
+    """
+
+    radius_km = min(np.radians(index["cell_degrees"]) * EARTH_RADIUS_KM, max_radius_km)
+    while True:
+        positions, distances = query_radius(index, latitude, longitude, radius_km, keep=keep)
+        if len(positions) >= k or radius_km >= max_radius_km:
+            return positions[:k], distances[:k]
+        radius_km = min(radius_km * 2, max_radius_km)
+
+def restaurant_filter(df, cuisine_table=None, cuisines=None, price_types=None, min_rating=None):
+    """
+    A `keep` callable for the spatial queries; every condition is only evaluated on the candidates.
+
+    Parameters:
+    - df (pandas.DataFrame): The processed dataset, in store order, with price_range and aggregate_rating.
+    - cuisine_table (dict, optional): The cuisine table (see utils.cuisines); required with `cuisines`.
+    - cuisines (list, optional): Keep restaurants offering any of these cuisines.
+    - price_types (list, optional): Keep these price types ("cheap", "normal", ...).
+    - min_rating (float, optional): Keep restaurants rated at least this much.
+
+    Returns:
+    - callable or None: None when there is nothing to filter.
+    """
+
+    conditions = []
+    if cuisines is not None:
+        offering = restaurants_with_cuisines(cuisine_table, cuisines)
+        conditions.append(lambda positions: contains_sorted(offering, positions))
+    if price_types is not None:
+        price_range = df["price_range"].to_numpy()
+        conditions.append(lambda positions: price_type_names(pd.Series(price_range[positions]))
+                          .isin(price_types).to_numpy())
+    if min_rating is not None:
+        rating = df["aggregate_rating"].to_numpy()
+        conditions.append(lambda positions: rating[positions] >= min_rating)
+
+    if not conditions:
+        return None
+
+    def keep(positions):
+        mask = np.ones(len(positions), dtype=bool)
+        for condition in conditions:
+            mask &= condition(positions)
+        return mask
+
+    return keep
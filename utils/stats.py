@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+# Partial results are central-moment sums, which merge exactly (Pébay, 2008); the median does not
+# merge and is only reported by describe_numeric, which sees all the data at once.
+MOMENT_COLUMNS = ["count", "mean", "m2", "m3", "m4", "min", "max"]
+
+STATISTICS_COLUMNS = ["min", "max", "range", "mean", "median", "std", "skew", "kurtosis"]
+
+def numeric_columns(df):
+    return df.select_dtypes("number").columns.tolist()
+
+def _group_codes(df, by):
+    if by is None:
+        return np.zeros(len(df), dtype=np.int64), None
+    grouped = df.groupby(by, observed=True, sort=True)
+    return grouped.ngroup().to_numpy(), grouped.size().index
+
+def compute_moments(df, by=None, columns=None):
+    """
+    Partial statistics of numeric columns, optionally per group, that can be merged across chunks.
+
+    For each (group, column) the count, mean, sums of the 2nd to 4th powers of deviations from the
+    mean, minimum and maximum are computed with array operations over all columns at once: one pass
+    for the means and one for the deviation sums. Missing values are ignored, and so are rows with a
+    missing group key, like groupby does.
+
+    Parameters:
+    - df (pandas.DataFrame): The data.
+    - by (str or list, optional): Grouping column(s), e.g. 'country' or ['country', 'city'].
+    - columns (list, optional): Columns to describe; all numeric columns by default.
+
+    Returns:
+    - pandas.DataFrame: MOMENT_COLUMNS, indexed by the group keys (if any) and `attributes`.
+    """
+
+    columns = columns or [c for c in numeric_columns(df) if by is None or c not in np.atleast_1d(by)]
+    if by is not None:
+        df = df[df[list(np.atleast_1d(by))].notna().all(axis=1)]
+    codes, groups = _group_codes(df, by)
+    n_groups = 1 if groups is None else len(groups)
+
+    values = df[columns].to_numpy(dtype=np.float64)
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+
+    def group_sum(x):
+        return np.stack([np.bincount(codes, weights=x[:, j], minlength=n_groups) for j in range(x.shape[1])],
+                        axis=1).reshape(n_groups, x.shape[1])
+
+    count = group_sum(present.astype(np.float64))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = group_sum(filled) / count
+    deviation = np.where(present, values - mean[codes], 0.0)
+    squared = deviation * deviation
+    m2 = group_sum(squared)
+    m3 = group_sum(squared * deviation)
+    m4 = group_sum(squared * squared)
+
+    grouped = pd.DataFrame(values).groupby(codes)
+    minimum = grouped.min().reindex(range(n_groups)).fillna(np.inf).to_numpy()
+    maximum = grouped.max().reindex(range(n_groups)).fillna(-np.inf).to_numpy()
+
+    if groups is None:
+        index = pd.Index(columns, name="attributes")
+    else:
+        keys = groups.to_frame(index=False)
+        keys = keys.loc[keys.index.repeat(len(columns))].reset_index(drop=True)
+        keys["attributes"] = np.tile(columns, n_groups)
+        index = pd.MultiIndex.from_frame(keys)
+
+    return pd.DataFrame({
+        "count": count.ravel(), "mean": mean.ravel(), "m2": m2.ravel(), "m3": m3.ravel(),
+        "m4": m4.ravel(), "min": minimum.ravel(), "max": maximum.ravel(),
+    }, index=index)
+
+def _merge_pair(a, b):
+    na, nb = a["count"], b["count"]
+    n = na + nb
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = (b["mean"] - a["mean"]).where((na > 0) & (nb > 0), 0.0)
+        mean = (a["mean"].where(na > 0, 0.0) * na + b["mean"].where(nb > 0, 0.0) * nb) / n
+        m2 = a["m2"] + b["m2"] + delta ** 2 * na * nb / n
+        m3 = (a["m3"] + b["m3"]
+              + delta ** 3 * na * nb * (na - nb) / n ** 2
+              + 3 * delta * (na * b["m2"] - nb * a["m2"]) / n)
+        m4 = (a["m4"] + b["m4"]
+              + delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / n ** 3
+              + 6 * delta ** 2 * (na ** 2 * b["m2"] + nb ** 2 * a["m2"]) / n ** 2
+              + 4 * delta * (na * b["m3"] - nb * a["m3"]) / n)
+    merged = pd.DataFrame({
+        "count": n, "mean": mean, "m2": m2.fillna(0.0), "m3": m3.fillna(0.0), "m4": m4.fillna(0.0),
+        "min": np.minimum(a["min"], b["min"]), "max": np.maximum(a["max"], b["max"]),
+    })
+    return merged[MOMENT_COLUMNS]
+
+def merge_moments(partials):
+    """
+    Combine partial results of compute_moments computed on disjoint chunks or partitions.
+
+    Groups missing from some partials are treated as empty there.
+    """
+
+    empty = {"count": 0.0, "mean": np.nan, "m2": 0.0, "m3": 0.0, "m4": 0.0, "min": np.inf, "max": -np.inf}
+    merged = None
+    for partial in partials:
+        if merged is None:
+            merged = partial
+            continue
+        index = merged.index.union(partial.index, sort=False)
+        merged = _merge_pair(merged.reindex(index).fillna(empty), partial.reindex(index).fillna(empty))
+    return merged
+
+def finalize_moments(moments):
+    """
+    Turn (merged) partial results into descriptive statistics.
+
+    `std` is the population standard deviation (like numpy.std); `skew` and `kurtosis` are the
+    bias-corrected sample estimates pandas reports. `median` is NaN: it cannot be derived from
+    mergeable partials.
+    """
+
+    n = moments["count"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(moments["m2"] / n)
+        skew = n * (n - 1) ** 0.5 / (n - 2) * moments["m3"] / moments["m2"] ** 1.5
+        kurtosis = (n * (n + 1) * (n - 1) * moments["m4"] / ((n - 2) * (n - 3) * moments["m2"] ** 2)
+                    - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)))
+    skew = skew.where(moments["m2"] != 0, 0.0).where(n >= 3)
+    kurtosis = kurtosis.where(moments["m2"] != 0, 0.0).where(n >= 4)
+
+    minimum = moments["min"].where(n > 0)
+    maximum = moments["max"].where(n > 0)
+    return pd.DataFrame({
+        "min": minimum, "max": maximum, "range": maximum - minimum, "mean": moments["mean"].where(n > 0),
+        "median": np.nan, "std": std, "skew": skew, "kurtosis": kurtosis,
+    }, index=moments.index)[STATISTICS_COLUMNS]
+
+def describe_numeric(df, by=None, columns=None):
+    """
+    Descriptive statistics (min, max, range, mean, median, std, skew, kurtosis) of numeric columns,
+    optionally per group, computed with the vectorized moment engine plus an exact median.
+
+    Parameters:
+    - df (pandas.DataFrame): The data.
+    - by (str or list, optional): Grouping column(s).
+    - columns (list, optional): Columns to describe; all numeric columns by default.
+
+    Returns:
+    - pandas.DataFrame: One row per (group, attribute) with the group keys, `attributes` and
+      STATISTICS_COLUMNS.
+    """
+
+    moments = compute_moments(df, by=by, columns=columns)
+    statistics = finalize_moments(moments)
+    columns = moments.index.get_level_values("attributes").unique().tolist()
+
+    if by is None:
+        median = df[columns].median()
+    else:
+        median = df.groupby(by, observed=True, sort=True)[columns].median().stack(dropna=False)
+    statistics["median"] = median.reindex(statistics.index).to_numpy()
+
+    return statistics.reset_index()
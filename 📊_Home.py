@@ -1,51 +1,71 @@
-import folium.plugins
-import streamlit as st
-import folium
-
-from streamlit_folium import folium_static
-
-from  utils.helpers import process_data
-
-RAW_DATA_PATH = "./data/raw/zomato.csv"
-
+import time
 
-st.set_page_config(
-    page_title="Home",
-    page_icon="📊",
-    layout="wide"
+import streamlit as st
+import streamlit.components.v1 as components
 
-)
+from utils.build import build_status, start_build
+from utils.instrument import begin_run, instrumented, timing_panel
+from utils.loader import NO_DATASET_MESSAGE, count_distinct, dataset_available, dataset_version, load_dataset
+from utils.maps import MAP_COLUMNS, MAP_MAX_MARKERS, build_map, cached_map_html
 
+@instrumented
 def create_map(dataframe):
-    f = folium.Figure(width=1920, height=1080)
-
-    m = folium.Map(max_bounds=True, tiles="CartoDB positron")
-    marker_cluster = folium.plugins.MarkerCluster().add_to(m)
-
-    for _, line in dataframe.iterrows():
-        folium.Marker(
-            [line["latitude"], line["longitude"]],
-            popup=folium.Popup(
-                folium.Html(
-                    (
-                        f"<p><strong>{line['restaurant_name']}</strong></p>"
-                        f"<br>Price: {line['average_cost_for_two']},00 ({line['currency']}) for two"
-                        f"<br>Type: {line['cuisines']}"
-                        f"<br>Aggragate Rating: {line['aggregate_rating']}/5.0"
-                    ),
-                    script=True,
-                ),
-                max_width=500,
-            ),
-            icon=folium.Icon(color=line["color_name"], icon="home", prefix="fa"),
-        ).add_to(marker_cluster)
-
-    folium.LayerControl().add_to(m)
-    folium_static(m, width=1024, height=768)
+    return build_map(dataframe, max_markers=MAP_MAX_MARKERS)
+
+def show_map():
+    html = cached_map_html(dataset_version(), lambda: create_map(load_dataset(columns=MAP_COLUMNS)))
+    components.html(html, width=1024, height=768 + 10)
+
+def dataset_panel(polling):
+    """
+    Published version and state of the latest build, with a button starting a new one in the background.
+
+    Sessions keep serving the published version while a build runs; once it has published, the page
+    reruns on the new one.
+    """
+
+    status = build_status()
+    running = status is not None and status["state"] == "running"
+    if polling and not running:
+        st.rerun()
+
+    st.markdown("## Dataset")
+    if dataset_available():
+        st.caption(f"Serving version {dataset_version()}")
+
+    if running:
+        st.progress(status["progress"],
+                    text=f"Updating: {status['rows']:,} raw rows in {status['chunks']:,} chunks processed")
+    elif status is not None and status["state"] == "succeeded":
+        finished = time.strftime("%Y-%m-%d %H:%M", time.localtime(status["finished"]))
+        st.caption(f"Last update {finished}: {status['status']}")
+    elif status is not None and status["state"] == "failed":
+        st.error(f"Last update failed: {status['error']}")
+    elif status is not None:
+        st.warning("Last update was interrupted before it finished.")
+
+    if st.button("Update from the raw export", disabled=running):
+        start_build()
+        st.rerun()
+
+def show_dataset_panel():
+    # Poll the build status every few seconds, but only while a build is running.
+    status = build_status()
+    polling = status is not None and status["state"] == "running"
+    with st.sidebar:
+        st.experimental_fragment(dataset_panel, run_every=2 if polling else None)(polling)
 
 def main():
+    st.set_page_config(page_title="Home", page_icon="📊", layout="wide")
+    begin_run("Home")
+
+    show_dataset_panel()
 
-    df = process_data(RAW_DATA_PATH)
+    if not dataset_available():
+        st.error(NO_DATASET_MESSAGE)
+        st.stop()
+
+    df = load_dataset(columns=["restaurant_id", "country", "votes"])
 
     st.markdown("# Fome Zero!")
 
@@ -67,7 +87,7 @@ def main():
 
     tabs[2].metric(
         "Registered Cities",
-        df['city'].nunique(),
+        count_distinct("cities_by_country"),
     )
 
     tabs[3].metric(
@@ -77,10 +97,12 @@ def main():
 
     tabs[4].metric(
         f"Types of Cuisines\nOffered",
-        df['cuisines_'].nunique(),
+        count_distinct("cuisines_by_country"),
     )
 
-    create_map(df)
+    show_map()
+
+    timing_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file